@@ -0,0 +1,69 @@
+from django.core.cache import cache
+from django.db.models import Q
+from django.http import Http404
+from .models import Child
+
+# Cross-request cache of each user's accessible children; writes that change
+# a child, its ownership or its family membership invalidate it (see accounts.signals)
+ACCESS_CACHE_TIMEOUT = 60 * 60
+
+def _cache_key(user_id):
+    return f"access:children:{user_id}"
+
+def get_accessible_children(user):
+    """Child objects the user owns or was invited to, loaded at most once per request"""
+    if not user.is_authenticated:
+        return []
+    
+    # request.user is a single object for the whole request, so memoize on it
+    children = getattr(user, '_accessible_children', None)
+    if children is not None:
+        return children
+    
+    children = cache.get(_cache_key(user.pk))
+    if children is None:
+        condition = Q(family_members=user)
+        if user.is_owner:
+            condition |= Q(owner=user)
+        children = list(Child.objects.filter(condition).distinct().order_by('id'))
+        cache.set(_cache_key(user.pk), children, ACCESS_CACHE_TIMEOUT)
+    
+    user._accessible_children = children
+    user._accessible_child_ids = frozenset(child.id for child in children)
+    return children
+
+def get_accessible_child_ids(user):
+    """IDs of the accessible children, for queryset filters and membership checks"""
+    if not user.is_authenticated:
+        return frozenset()
+    
+    if getattr(user, '_accessible_child_ids', None) is None:
+        get_accessible_children(user)
+    return user._accessible_child_ids
+
+def can_access_child(user, child_id):
+    """O(1) membership check against the memoized IDs"""
+    return child_id in get_accessible_child_ids(user)
+
+def accessible_children(user):
+    """Queryset of accessible children, for forms and further filtering"""
+    return Child.objects.filter(id__in=get_accessible_child_ids(user)).order_by('id')
+
+def get_accessible_child(user, child_id=None):
+    """The requested child (404 if not accessible), or the first accessible child when none is requested"""
+    children = get_accessible_children(user)
+    if not child_id:
+        return children[0] if children else None
+    
+    for child in children:
+        if str(child.id) == str(child_id):
+            return child
+    raise Http404("Child not found")
+
+def filter_accessible(queryset, user, field='child'):
+    """Restrict any queryset with a child foreign key to the user's children"""
+    return queryset.filter(**{f'{field}_id__in': get_accessible_child_ids(user)})
+
+def invalidate_access(*user_ids):
+    """Drop the cached children of the given users"""
+    cache.delete_many([_cache_key(user_id) for user_id in user_ids if user_id])
\ No newline at end of file
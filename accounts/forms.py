@@ -53,7 +53,7 @@ class ProfileForm(forms.ModelForm):
 class ChildForm(forms.ModelForm):
     class Meta:
         model = Child
-        fields = ['name', 'birth_date', 'birth_time', 'birth_location', 'avatar']
+        fields = ['name', 'birth_date', 'sex', 'birth_time', 'birth_location', 'avatar']
         widgets = {
             'birth_date': forms.DateInput(attrs={'type': 'date'}),
             'birth_time': forms.TimeInput(attrs={'type': 'time'}),
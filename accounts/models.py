@@ -33,8 +33,15 @@ class User(AbstractUser):
         return self.role == 'child'
 
 class Child(models.Model):
+    SEX_CHOICES = [
+        ('F', 'Female'),
+        ('M', 'Male'),
+    ]
+    
     name = models.CharField(max_length=100)
     birth_date = models.DateField()
+    # Selects the growth reference tables; percentiles are left out while blank
+    sex = models.CharField(max_length=1, choices=SEX_CHOICES, blank=True)
     birth_time = models.TimeField(blank=True, null=True)
     birth_location = models.CharField(max_length=200, blank=True)
     owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name='owned_children')
@@ -64,6 +71,10 @@ class Child(models.Model):
         today = timezone.now().date()
         return (today - self.birth_date).days
     
+    def days_old_at(self, moment):
+        """Age in whole days on the local date of an event"""
+        return (timezone.localdate(moment) - self.birth_date).days
+    
     def get_unlocked_features(self):
         """Return list of unlocked features based on age"""
         age = self.age_in_years
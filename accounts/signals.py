@@ -0,0 +1,56 @@
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+from .access import invalidate_access
+from .models import Child, User
+
+def _child_user_ids(child):
+    return [child.owner_id, *child.family_members.values_list('id', flat=True)]
+
+@receiver(pre_save, sender=Child)
+def remember_previous_owner(sender, instance, **kwargs):
+    instance._previous_owner_id = instance._previous_birth_date = None
+    if instance.pk:
+        previous = Child.objects.filter(pk=instance.pk).values_list('owner_id', 'birth_date').first()
+        if previous:
+            instance._previous_owner_id, instance._previous_birth_date = previous
+
+@receiver(post_save, sender=Child)
+def invalidate_child_access(sender, instance, created, **kwargs):
+    # Cached entries hold the Child rows themselves, so any edit invalidates them
+    if created:
+        invalidate_access(instance.owner_id)
+    else:
+        invalidate_access(instance._previous_owner_id, *_child_user_ids(instance))
+
+@receiver(post_save, sender=Child)
+def recompute_ages_on_birth_date_change(sender, instance, created, **kwargs):
+    """Stored ages of memories, milestones and growth records count from the birth date"""
+    if not created and instance._previous_birth_date not in (None, instance.birth_date):
+        from core.ages import recompute_child_ages
+        transaction.on_commit(lambda: recompute_child_ages(instance.pk))
+
+@receiver(pre_delete, sender=Child)
+def remember_child_users(sender, instance, **kwargs):
+    # Family links are gone by post_delete
+    instance._access_user_ids = _child_user_ids(instance)
+
+@receiver(post_delete, sender=Child)
+def invalidate_deleted_child_access(sender, instance, **kwargs):
+    invalidate_access(*getattr(instance, '_access_user_ids', [instance.owner_id]))
+
+@receiver(post_save, sender=User)
+def invalidate_user_access(sender, instance, created, **kwargs):
+    # The owner role decides whether owned children are included
+    if not created:
+        invalidate_access(instance.pk)
+
+@receiver(m2m_changed, sender=Child.family_members.through)
+def invalidate_family_access(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == 'pre_clear':
+        # Members are unknown once the clear has run
+        user_ids = [instance.pk] if reverse else _child_user_ids(instance)
+        invalidate_access(*user_ids)
+    elif action in ('post_add', 'post_remove'):
+        user_ids = [instance.pk] if reverse else list(pk_set or [])
+        invalidate_access(*user_ids)
\ No newline at end of file
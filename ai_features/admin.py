@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import BedtimeStory, AITask
+from .models import AIResult, BedtimeStory, AITask
 
 class BedtimeStoryAdmin(admin.ModelAdmin):
     list_display = ['title', 'child', 'created_by', 'is_favorite', 'created_at']
@@ -12,5 +12,12 @@ class AITaskAdmin(admin.ModelAdmin):
     list_filter = ['task_type', 'status', 'created_at']
     readonly_fields = ['id', 'created_at', 'completed_at']
 
+class AIResultAdmin(admin.ModelAdmin):
+    list_display = ['key', 'model', 'hit_count', 'created_at', 'last_used_at']
+    list_filter = ['model']
+    search_fields = ['key']
+    readonly_fields = ['key', 'model', 'content', 'hit_count', 'created_at', 'last_used_at']
+
 admin.site.register(BedtimeStory, BedtimeStoryAdmin)
-admin.site.register(AITask, AITaskAdmin)
\ No newline at end of file
+admin.site.register(AITask, AITaskAdmin)
+admin.site.register(AIResult, AIResultAdmin)
\ No newline at end of file
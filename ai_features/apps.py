@@ -0,0 +1,8 @@
+from django.apps import AppConfig
+
+class AiFeaturesConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'ai_features'
+    
+    def ready(self):
+        from . import signals
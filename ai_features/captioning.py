@@ -0,0 +1,129 @@
+import asyncio
+import logging
+import time
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+from core.dashboard import touch_child
+from memories.models import Memory
+from memories.search import update_search_vector
+from .events import publish_task_event
+from .models import AITask
+
+logger = logging.getLogger(__name__)
+
+CAPTION_MODEL = 'gpt-3.5-turbo'
+CAPTION_MAX_TOKENS = 150
+CAPTION_TEMPERATURE = 0.7
+
+def caption_prompt(child_name, title, content):
+    return f"""Generate a warm, family-friendly caption for a photo in {child_name}'s memory album.
+        The photo is titled "{title}" and has this description: "{content}".
+        
+        Create a caption that captures the moment and emotion, suitable for a family memory book."""
+
+def caption_messages(child_name, title, content):
+    return [{"role": "user", "content": caption_prompt(child_name, title, content)}]
+
+def uncaptioned_photos(album_id=None, child_id=None):
+    """Photo memories of an album or a child that have no AI caption yet"""
+    memories = Memory.objects.exclude(image='').exclude(image__isnull=True).filter(ai_caption='')
+    if album_id:
+        return memories.filter(albums__album_id=album_id)
+    return memories.filter(child_id=child_id)
+
+def openai_client(async_client=False):
+    """An OpenAI client for the configured API key and, optionally, an OpenAI-compatible server"""
+    import openai
+    client_class = openai.AsyncOpenAI if async_client else openai.OpenAI
+    return client_class(
+        api_key=settings.OPENAI_API_KEY,
+        base_url=settings.OPENAI_BASE_URL,
+        max_retries=settings.OPENAI_MAX_RETRIES,
+    )
+
+class RateLimiter:
+    """Token bucket spacing requests to stay under a per-minute budget, shared by all workers of a batch"""
+    def __init__(self, per_minute):
+        self.interval = 60 / per_minute
+        self.next_slot = time.monotonic()
+        self.lock = asyncio.Lock()
+    
+    async def wait(self):
+        async with self.lock:
+            now = time.monotonic()
+            delay = self.next_slot - now
+            self.next_slot = max(now, self.next_slot) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+async def _caption_one(client, semaphore, limiter, task, memory):
+    async with semaphore:
+        await limiter.wait()
+        try:
+            response = await client.chat.completions.create(
+                model=CAPTION_MODEL,
+                messages=caption_messages(memory['child__name'], memory['title'], memory['content']),
+                max_tokens=CAPTION_MAX_TOKENS,
+                temperature=CAPTION_TEMPERATURE,
+            )
+            caption = response.choices[0].message.content.strip()
+        except Exception as e:
+            logger.error(f"Error captioning memory {memory['id']} in batch {task.pk}: {e}")
+            await AITask.objects.filter(pk=task.pk).aupdate(failed_items=F('failed_items') + 1)
+            task.failed_items += 1
+            publish_task_event(task)
+            return None
+    
+    # Don't overwrite a caption written while the batch was running; bumping
+    # updated_at retires the memory's cached card fragments, touching the
+    # child its cached dashboard summary
+    await Memory.objects.filter(pk=memory['id'], ai_caption='').aupdate(
+        ai_caption=caption, updated_at=timezone.now()
+    )
+    await sync_to_async(touch_child)(memory['child_id'])
+    await AITask.objects.filter(pk=task.pk).aupdate(processed_items=F('processed_items') + 1)
+    task.processed_items += 1
+    publish_task_event(task)
+    return caption
+
+async def caption_batch(task, memories, concurrency=None, per_minute=None):
+    """Caption memories with one shared async client, at most `concurrency` requests in flight"""
+    semaphore = asyncio.Semaphore(concurrency or settings.AI_CAPTION_CONCURRENCY)
+    limiter = RateLimiter(per_minute or settings.AI_REQUESTS_PER_MINUTE)
+    async with openai_client(async_client=True) as client:
+        return await asyncio.gather(*[
+            _caption_one(client, semaphore, limiter, task, memory) for memory in memories
+        ])
+
+def run_batch_caption(task):
+    """Caption every uncaptioned photo named by the task's album_id or child_id"""
+    memories = list(uncaptioned_photos(
+        album_id=task.input_data.get('album_id'),
+        child_id=task.input_data.get('child_id'),
+    ).values('id', 'title', 'content', 'child_id', 'child__name'))
+    
+    task.total_items = len(memories)
+    task.processed_items = task.failed_items = 0
+    AITask.objects.filter(pk=task.pk).update(total_items=task.total_items, processed_items=0, failed_items=0)
+    
+    started = time.monotonic()
+    captions = asyncio.run(caption_batch(task, memories))
+    captioned = sum(1 for caption in captions if caption is not None)
+    
+    # Captions were written with update(), so refresh their search documents here
+    update_search_vector([memory['id'] for memory, caption in zip(memories, captions) if caption is not None])
+    
+    task.refresh_from_db()
+    task.status = 'completed' if captioned or not memories else 'failed'
+    task.output_data = {
+        'captioned': captioned,
+        'failed': len(memories) - captioned,
+        'seconds': round(time.monotonic() - started, 1),
+    }
+    if task.status == 'failed':
+        task.error_message = 'No captions could be generated'
+    task.completed_at = timezone.now()
+    task.save()
+    return task
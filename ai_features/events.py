@@ -0,0 +1,103 @@
+import json
+import logging
+import time
+import redis
+import redis.asyncio
+from django.conf import settings
+from .models import AITask
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATUSES = {'completed', 'failed'}
+
+# Streams are async generators served under ASGI, so an open tab costs a
+# coroutine and a Redis connection rather than a worker thread. They still end
+# after STREAM_TIMEOUT; browsers reconnect after RETRY_MS and get a fresh snapshot first
+STREAM_TIMEOUT = 5 * 60
+HEARTBEAT_SECONDS = 15
+RETRY_MS = 2000
+MAX_WATCHED_TASKS = 20
+
+_client = None
+
+def redis_client():
+    global _client
+    if _client is None:
+        _client = redis.Redis.from_url(settings.EVENTS_REDIS_URL)
+    return _client
+
+def async_redis_client():
+    """A client for one stream; asyncio connections belong to the event loop that opened them"""
+    return redis.asyncio.Redis.from_url(settings.EVENTS_REDIS_URL)
+
+def task_channel(task_id):
+    return f"aitask:{task_id}"
+
+def task_event(task):
+    return {
+        'id': str(task.pk),
+        'task_type': task.task_type,
+        'status': task.status,
+        'progress': task.progress,
+        'processed_items': task.processed_items,
+        'failed_items': task.failed_items,
+        'total_items': task.total_items,
+        'output': task.output_data if task.status == 'completed' else None,
+        'error': task.error_message,
+    }
+
+def publish_task_event(task):
+    """
+    Announce a task's current state to everyone watching it.
+    Best effort: watchers get a fresh snapshot when they reconnect, so a Redis
+    outage must not fail the task that is reporting progress.
+    """
+    try:
+        redis_client().publish(task_channel(task.pk), json.dumps(task_event(task)))
+    except redis.RedisError as e:
+        logger.warning(f"Could not publish event for AI task {task.pk}: {e}")
+
+def format_event(payload, event='task'):
+    return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+
+async def next_message(pubsub, timeout):
+    """The next published message, or None once `timeout` seconds pass without one"""
+    deadline = time.monotonic() + timeout
+    while (remaining := deadline - time.monotonic()) > 0:
+        # Subscribe confirmations come back as None before the wait is over
+        message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=remaining)
+        if message is not None:
+            return message
+    return None
+
+async def task_event_stream(user, task_ids):
+    """Server-Sent Events for the user's tasks until they all finish or the stream times out"""
+    client = async_redis_client()
+    pubsub = client.pubsub(ignore_subscribe_messages=True)
+    await pubsub.subscribe(*[task_channel(task_id) for task_id in task_ids])
+    try:
+        yield f"retry: {RETRY_MS}\n\n"
+        
+        # Snapshot after subscribing, so a change between the two is never lost
+        pending = set()
+        async for task in AITask.objects.filter(created_by=user, id__in=task_ids):
+            yield format_event(task_event(task))
+            if task.status not in TERMINAL_STATUSES:
+                pending.add(str(task.pk))
+        
+        deadline = time.monotonic() + STREAM_TIMEOUT
+        while pending and time.monotonic() < deadline:
+            message = await next_message(pubsub, HEARTBEAT_SECONDS)
+            if message is None:
+                yield ": keepalive\n\n"
+                continue
+            
+            payload = json.loads(message['data'])
+            if payload['id'] not in pending:
+                continue
+            yield format_event(payload)
+            if payload['status'] in TERMINAL_STATUSES:
+                pending.discard(payload['id'])
+    finally:
+        await pubsub.aclose()
+        await client.aclose()
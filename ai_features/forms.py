@@ -1,4 +1,5 @@
 from django import forms
+from accounts.access import get_accessible_children
 from accounts.models import Child
 
 class BedtimeStoryForm(forms.Form):
@@ -28,17 +29,16 @@ class BedtimeStoryForm(forms.Form):
         }),
         help_text="Describe characters, setting, or specific elements you'd like in the story"
     )
+    regenerate = forms.BooleanField(
+        required=False,
+        help_text="Write a new story even if this exact request has been made before"
+    )
     
     def __init__(self, *args, **kwargs):
         user = kwargs.pop('user', None)
         super().__init__(*args, **kwargs)
         
         if user:
-            if user.is_owner:
-                children = Child.objects.filter(owner=user)
-            else:
-                children = user.children.all()
-            
             # Only show children who have bedtime stories unlocked
-            unlocked_children = [child for child in children if child.has_feature('bedtime_stories')]
+            unlocked_children = [child for child in get_accessible_children(user) if child.has_feature('bedtime_stories')]
             self.fields['child'].queryset = Child.objects.filter(id__in=[c.id for c in unlocked_children])
\ No newline at end of file
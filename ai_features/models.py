@@ -6,6 +6,12 @@ import uuid
 User = get_user_model()
 
 class BedtimeStory(models.Model):
+    STATUS_CHOICES = [
+        ('generating', 'Generating'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+    
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     child = models.ForeignKey(Child, on_delete=models.CASCADE, related_name='bedtime_stories')
     title = models.CharField(max_length=200)
@@ -13,6 +19,8 @@ class BedtimeStory(models.Model):
     prompt_used = models.TextField()
     created_by = models.ForeignKey(User, on_delete=models.CASCADE)
     is_favorite = models.BooleanField(default=False)
+    # Stories are created when requested and filled in as the completion streams
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='completed')
     created_at = models.DateTimeField(auto_now_add=True)
     
     class Meta:
@@ -24,6 +32,7 @@ class BedtimeStory(models.Model):
 class AITask(models.Model):
     TASK_TYPES = [
         ('caption', 'Photo Caption'),
+        ('batch_caption', 'Batch Photo Captions'),
         ('bedtime_story', 'Bedtime Story'),
         ('transcription', 'Audio Transcription'),
         ('year_review', 'Year in Review'),
@@ -42,6 +51,12 @@ class AITask(models.Model):
     input_data = models.JSONField(default=dict)
     output_data = models.JSONField(default=dict)
     error_message = models.TextField(blank=True)
+    
+    # Per-item progress of batch tasks
+    total_items = models.PositiveIntegerField(default=0)
+    processed_items = models.PositiveIntegerField(default=0)
+    failed_items = models.PositiveIntegerField(default=0)
+    
     created_by = models.ForeignKey(User, on_delete=models.CASCADE)
     created_at = models.DateTimeField(auto_now_add=True)
     completed_at = models.DateTimeField(null=True, blank=True)
@@ -50,4 +65,25 @@ class AITask(models.Model):
         ordering = ['-created_at']
     
     def __str__(self):
-        return f"{self.get_task_type_display()} - {self.status}"
\ No newline at end of file
+        return f"{self.get_task_type_display()} - {self.status}"
+    
+    @property
+    def progress(self):
+        """Percentage of batch items finished, successfully or not"""
+        if self.status == 'completed':
+            return 100
+        if not self.total_items:
+            return 0
+        return min(99, (self.processed_items + self.failed_items) * 100 // self.total_items)
+
+class AIResult(models.Model):
+    """A completion cached under the hash of its model, parameters and rendered prompt"""
+    key = models.CharField(max_length=64, unique=True)
+    model = models.CharField(max_length=100)
+    content = models.TextField()
+    hit_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_used_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    
+    def __str__(self):
+        return f"{self.model} {self.key[:12]} ({self.hit_count} hits)"
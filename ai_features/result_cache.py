@@ -0,0 +1,77 @@
+import hashlib
+import json
+from datetime import timedelta
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+from .models import AIResult
+
+def result_key(model, messages, **params):
+    """Content address of a completion: model, sampling parameters and the fully rendered messages"""
+    payload = json.dumps({'model': model, 'params': params, 'messages': messages}, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+def get_result(key):
+    """Cached completion content, or None if missing or expired; a hit refreshes its LRU position"""
+    expires_before = timezone.now() - timedelta(seconds=settings.AI_RESULT_CACHE_TTL)
+    result = AIResult.objects.filter(key=key, created_at__gte=expires_before).only('content').first()
+    if result is None:
+        return None
+    AIResult.objects.filter(pk=result.pk).update(last_used_at=timezone.now(), hit_count=F('hit_count') + 1)
+    return result.content
+
+def store_result(key, model, content):
+    AIResult.objects.update_or_create(
+        key=key,
+        defaults={'model': model, 'content': content, 'created_at': timezone.now(), 'last_used_at': timezone.now()},
+    )
+    evict_results()
+
+def evict_results():
+    """Drop expired results, then the least recently used ones beyond the size limit"""
+    expires_before = timezone.now() - timedelta(seconds=settings.AI_RESULT_CACHE_TTL)
+    AIResult.objects.filter(created_at__lt=expires_before).delete()
+    
+    limit = settings.AI_RESULT_CACHE_MAX_ENTRIES
+    cutoff = list(AIResult.objects.order_by('-last_used_at').values_list('last_used_at', flat=True)[limit:limit + 1])
+    if cutoff:
+        AIResult.objects.filter(last_used_at__lte=cutoff[0]).delete()
+
+def cached_completion(client, model, messages, regenerate=False, **params):
+    """
+    Chat completion content for the prompt, served from the result cache when possible.
+    Returns (content, cached); regenerate=True always calls the API and replaces the cached result.
+    """
+    key = result_key(model, messages, **params)
+    if not regenerate:
+        content = get_result(key)
+        if content is not None:
+            return content, True
+    
+    response = client.chat.completions.create(model=model, messages=messages, **params)
+    content = response.choices[0].message.content.strip()
+    store_result(key, model, content)
+    return content, False
+
+def streamed_completion(client, model, messages, on_text, regenerate=False, **params):
+    """
+    Like cached_completion, but hands each piece of text to on_text as it arrives.
+    A cached result is handed over in one piece.
+    """
+    key = result_key(model, messages, **params)
+    if not regenerate:
+        content = get_result(key)
+        if content is not None:
+            on_text(content)
+            return content, True
+    
+    parts = []
+    for chunk in client.chat.completions.create(model=model, messages=messages, stream=True, **params):
+        text = chunk.choices[0].delta.content if chunk.choices else None
+        if text:
+            parts.append(text)
+            on_text(text)
+    
+    content = ''.join(parts).strip()
+    store_result(key, model, content)
+    return content, False
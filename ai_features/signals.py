@@ -0,0 +1,12 @@
+from django.db import transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from .events import publish_task_event
+from .models import AITask
+
+@receiver(post_save, sender=AITask)
+def announce_task_status(sender, instance, raw=False, **kwargs):
+    """Push every saved status change to watchers once it is visible in the database"""
+    if not raw:
+        # robust: a failed publish is logged instead of failing the task's save()
+        transaction.on_commit(lambda: publish_task_event(instance), robust=True)
@@ -0,0 +1,93 @@
+import json
+import time
+from .events import (
+    HEARTBEAT_SECONDS, RETRY_MS, STREAM_TIMEOUT, async_redis_client, format_event, next_message, redis_client
+)
+from .models import BedtimeStory
+
+# Seconds between pushes of buffered text; short enough to read as live typing,
+# long enough that a token-per-message stream doesn't flood Redis
+FLUSH_INTERVAL = 0.1
+
+# The partial text outlives the generation briefly, for readers still catching up
+BUFFER_TTL = 10 * 60
+
+def buffer_key(story_id):
+    return f"story:{story_id}:text"
+
+def story_channel(story_id):
+    return f"story:{story_id}"
+
+class StoryBuffer:
+    """Accumulates streamed story text in Redis and announces each appended piece with its offset"""
+    def __init__(self, story_id):
+        self.story_id = story_id
+        self.length = 0
+        self.pending = []
+        self.last_flush = 0
+
+    def append(self, text):
+        self.pending.append(text)
+        if time.monotonic() - self.last_flush >= FLUSH_INTERVAL:
+            self.flush()
+
+    def flush(self):
+        if not self.pending:
+            return
+        text = ''.join(self.pending)
+        self.pending = []
+        pipe = redis_client().pipeline()
+        pipe.append(buffer_key(self.story_id), text)
+        pipe.expire(buffer_key(self.story_id), BUFFER_TTL)
+        pipe.publish(story_channel(self.story_id), json.dumps({'offset': self.length, 'text': text}))
+        pipe.execute()
+        self.length += len(text)
+        self.last_flush = time.monotonic()
+
+    def finish(self, status):
+        self.flush()
+        redis_client().publish(story_channel(self.story_id), json.dumps({'done': True, 'status': status}))
+
+async def story_event_stream(story_id):
+    """Server-Sent Events with the story's text so far, then each new piece until it is complete"""
+    client = async_redis_client()
+    pubsub = client.pubsub(ignore_subscribe_messages=True)
+    await pubsub.subscribe(story_channel(story_id))
+    try:
+        yield f"retry: {RETRY_MS}\n\n"
+        
+        # Read after subscribing, so no piece published in between is lost
+        story = await BedtimeStory.objects.only('status', 'story_content').aget(pk=story_id)
+        if story.status != 'generating':
+            yield format_event({'text': story.story_content, 'replace': True}, 'chunk')
+            yield format_event({'status': story.status}, 'done')
+            return
+        
+        text = (await client.get(buffer_key(story_id)) or b'').decode()
+        sent = len(text)
+        if text:
+            yield format_event({'text': text}, 'chunk')
+        
+        deadline = time.monotonic() + STREAM_TIMEOUT
+        while time.monotonic() < deadline:
+            message = await next_message(pubsub, HEARTBEAT_SECONDS)
+            if message is None:
+                yield ": keepalive\n\n"
+                continue
+            
+            payload = json.loads(message['data'])
+            if payload.get('done'):
+                # The saved story is stripped and final; let the page swap it in
+                await story.arefresh_from_db(fields=['status', 'story_content'])
+                yield format_event({'text': story.story_content, 'replace': True}, 'chunk')
+                yield format_event({'status': payload['status']}, 'done')
+                return
+            
+            # Skip text already sent from the buffer snapshot
+            start = sent - payload['offset']
+            if start < len(payload['text']):
+                yield format_event({'text': payload['text'][max(start, 0):]}, 'chunk')
+                sent = payload['offset'] + len(payload['text'])
+    finally:
+        await pubsub.aclose()
+        await client.aclose()
@@ -1,8 +1,13 @@
 from celery import shared_task
 from django.utils import timezone
-import openai
 from django.conf import settings
+from .captioning import (
+    CAPTION_MAX_TOKENS, CAPTION_MODEL, CAPTION_TEMPERATURE, caption_messages, openai_client, run_batch_caption
+)
 from .models import AITask, BedtimeStory
+from .result_cache import cached_completion, streamed_completion
+from .story_stream import StoryBuffer
+from .transcription import transcribe_memory
 from memories.models import Memory
 import logging
 
@@ -10,20 +15,24 @@ logger = logging.getLogger(__name__)
 
 @shared_task
 def generate_bedtime_story(task_id):
-    """Generate a bedtime story using OpenAI"""
+    """Generate a bedtime story using OpenAI, streaming it to readers as it is written"""
+    story = None
     try:
         task = AITask.objects.get(id=task_id)
         task.status = 'processing'
         task.save()
         
+        story = BedtimeStory.objects.get(id=task.input_data['story_id'])
+        buffer = StoryBuffer(story.pk)
+        
         if not settings.OPENAI_API_KEY:
             task.status = 'failed'
             task.error_message = 'OpenAI API key not configured'
             task.save()
+            BedtimeStory.objects.filter(pk=story.pk).update(status='failed')
+            buffer.finish('failed')
             return
         
-        openai.api_key = settings.OPENAI_API_KEY
-        
         input_data = task.input_data
         child_name = input_data['child_name']
         prompt = input_data['prompt']
@@ -41,32 +50,28 @@ def generate_bedtime_story(task_id):
         
         user_prompt = f"Write a bedtime story about: {prompt}. The main character should be named {child_name}."
         
-        response = openai.ChatCompletion.create(
-            model="gpt-3.5-turbo",
-            messages=[
+        # Identical prompts reuse the cached story unless the user asked to regenerate
+        story_content, cached = streamed_completion(
+            openai_client(),
+            "gpt-3.5-turbo",
+            [
                 {"role": "system", "content": system_prompt},
                 {"role": "user", "content": user_prompt}
             ],
+            buffer.append,
+            regenerate=input_data.get('regenerate', False),
             max_tokens=1500 if length == 'long' else 1000 if length == 'medium' else 600,
             temperature=0.8
         )
         
-        story_content = response.choices[0].message.content.strip()
-        
-        # Create the bedtime story
-        from accounts.models import Child
-        child = Child.objects.get(id=input_data['child_id'])
-        
-        bedtime_story = BedtimeStory.objects.create(
-            child=child,
-            title=f"A Special Story for {child_name}",
-            story_content=story_content,
-            prompt_used=prompt,
-            created_by=task.created_by
-        )
+        # Persist the finished story, then tell readers to swap in the saved text
+        story.story_content = story_content
+        story.status = 'completed'
+        story.save(update_fields=['story_content', 'status'])
+        buffer.finish('completed')
         
         task.status = 'completed'
-        task.output_data = {'story_id': str(bedtime_story.id)}
+        task.output_data = {'story_id': str(story.id), 'cached': cached}
         task.completed_at = timezone.now()
         task.save()
         
@@ -75,6 +80,9 @@ def generate_bedtime_story(task_id):
         task.status = 'failed'
         task.error_message = str(e)
         task.save()
+        if story is not None:
+            BedtimeStory.objects.filter(pk=story.pk).update(status='failed')
+            StoryBuffer(story.pk).finish('failed')
 
 @shared_task
 def generate_photo_caption(task_id):
@@ -100,28 +108,21 @@ def generate_photo_caption(task_id):
             return
         
         # For now, use a simple text completion since Vision API setup is complex
-        openai.api_key = settings.OPENAI_API_KEY
-        
-        prompt = f"""Generate a warm, family-friendly caption for a photo in {memory.child.name}'s memory album. 
-        The photo is titled "{memory.title}" and has this description: "{memory.content}".
-        
-        Create a caption that captures the moment and emotion, suitable for a family memory book."""
-        
-        response = openai.ChatCompletion.create(
-            model="gpt-3.5-turbo",
-            messages=[{"role": "user", "content": prompt}],
-            max_tokens=150,
-            temperature=0.7
+        caption, cached = cached_completion(
+            openai_client(),
+            CAPTION_MODEL,
+            caption_messages(memory.child.name, memory.title, memory.content),
+            regenerate=task.input_data.get('regenerate', False),
+            max_tokens=CAPTION_MAX_TOKENS,
+            temperature=CAPTION_TEMPERATURE
         )
         
-        caption = response.choices[0].message.content.strip()
-        
         # Update memory with AI caption
         memory.ai_caption = caption
         memory.save()
         
         task.status = 'completed'
-        task.output_data = {'caption': caption}
+        task.output_data = {'caption': caption, 'cached': cached}
         task.completed_at = timezone.now()
         task.save()
         
@@ -132,8 +133,8 @@ def generate_photo_caption(task_id):
         task.save()
 
 @shared_task
-def transcribe_audio_file(task_id):
-    """Transcribe audio file using OpenAI Whisper"""
+def generate_batch_captions(task_id):
+    """Caption every uncaptioned photo of an album or child with concurrent API requests"""
     try:
         task = AITask.objects.get(id=task_id)
         task.status = 'processing'
@@ -145,6 +146,24 @@ def transcribe_audio_file(task_id):
             task.save()
             return
         
+        run_batch_caption(task)
+        
+    except Exception as e:
+        logger.error(f"Error generating batch captions: {e}")
+        task.status = 'failed'
+        task.error_message = str(e)
+        task.save()
+
+@shared_task(acks_late=True, reject_on_worker_lost=True)
+def transcribe_audio_file(task_id):
+    """Transcribe a memory's audio with a local Whisper model, resuming where a lost worker stopped"""
+    try:
+        task = AITask.objects.get(id=task_id)
+        if task.status == 'completed':
+            return
+        task.status = 'processing'
+        task.save()
+        
         memory_id = task.input_data['memory_id']
         memory = Memory.objects.get(id=memory_id)
         
@@ -154,15 +173,7 @@ def transcribe_audio_file(task_id):
             task.save()
             return
         
-        openai.api_key = settings.OPENAI_API_KEY
-        
-        # This would need proper file handling for production
-        # For now, we'll simulate transcription
-        transcription = "Audio transcription feature coming soon!"
-        
-        # Update memory with transcription
-        memory.transcription = transcription
-        memory.save()
+        transcription = transcribe_memory(task, memory)
         
         task.status = 'completed'
         task.output_data = {'transcription': transcription}
@@ -173,4 +184,4 @@ def transcribe_audio_file(task_id):
         logger.error(f"Error transcribing audio: {e}")
         task.status = 'failed'
         task.error_message = str(e)
-        task.save()
\ No newline at end of file
+        task.save()
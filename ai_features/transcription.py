@@ -0,0 +1,100 @@
+import logging
+import math
+import threading
+import ffmpeg
+import numpy as np
+from django.conf import settings
+from django.utils import timezone
+from core.dashboard import touch_child
+from core.fair_queue import renew_current_slot
+from memories.models import Memory
+from memories.search import update_search_vector
+from memories.transcoding import local_copy, probe_duration
+from .events import publish_task_event
+from .models import AITask
+
+logger = logging.getLogger(__name__)
+
+# Whisper works on 16 kHz mono audio in 30 second windows
+SAMPLE_RATE = 16000
+CHUNK_SECONDS = 30
+BYTES_PER_SAMPLE = 2
+
+# Trailing transcript text passed as context to the next chunk
+PROMPT_TAIL_CHARS = 200
+
+_model = None
+_model_lock = threading.Lock()
+
+def get_model():
+    """The Whisper model, loaded on first use and kept resident for the life of the worker process"""
+    global _model
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                import whisper
+                logger.info(f"Loading Whisper model {settings.WHISPER_MODEL}")
+                _model = whisper.load_model(settings.WHISPER_MODEL, device='cpu')
+    return _model
+
+def pcm_chunks(source_path, offset=0):
+    """Decode once through ffmpeg, yielding float32 arrays of CHUNK_SECONDS at 16 kHz mono"""
+    process = (
+        ffmpeg
+        .input(source_path, ss=offset)
+        .output('pipe:', format='s16le', acodec='pcm_s16le', ac=1, ar=SAMPLE_RATE)
+        .global_args('-loglevel', 'error')
+        .run_async(pipe_stdout=True)
+    )
+    chunk_bytes = SAMPLE_RATE * CHUNK_SECONDS * BYTES_PER_SAMPLE
+    try:
+        while True:
+            data = process.stdout.read(chunk_bytes)
+            if not data:
+                break
+            yield np.frombuffer(data, np.int16).astype(np.float32) / 32768.0
+    finally:
+        process.stdout.close()
+        process.wait()
+
+def transcribe_memory(task, memory):
+    """
+    Transcribe a memory's audio chunk by chunk, saving the partial transcript after each one.
+    Progress lives on the task, so a retried task resumes after the last finished chunk.
+    """
+    model = get_model()
+    progress = task.output_data or {}
+    chunks_done = progress.get('chunks_done', 0)
+    text = progress.get('transcription', '') if chunks_done else ''
+    
+    with local_copy(memory.audio) as source_path:
+        duration = probe_duration(source_path)
+        task.total_items = max(1, math.ceil(duration / CHUNK_SECONDS))
+        task.processed_items = chunks_done
+        AITask.objects.filter(pk=task.pk).update(total_items=task.total_items, processed_items=chunks_done)
+        
+        for samples in pcm_chunks(source_path, offset=chunks_done * CHUNK_SECONDS):
+            result = model.transcribe(
+                samples,
+                fp16=False,
+                language=settings.WHISPER_LANGUAGE or None,
+                initial_prompt=text[-PROMPT_TAIL_CHARS:] or None,
+            )
+            text = ' '.join(part for part in [text, result['text'].strip()] if part)
+            chunks_done += 1
+            
+            task.processed_items = chunks_done
+            task.output_data = {'chunks_done': chunks_done, 'transcription': text}
+            AITask.objects.filter(pk=task.pk).update(
+                processed_items=chunks_done, output_data=task.output_data
+            )
+            # Partial transcript, visible while the rest is still being decoded
+            Memory.objects.filter(pk=memory.pk).update(transcription=text, updated_at=timezone.now())
+            touch_child(memory.child_id)
+            # Long recordings outlast the queue's lease; each chunk renews it
+            renew_current_slot()
+            publish_task_event(task)
+    
+    # The transcript was written with update(), so refresh the search document once at the end
+    update_search_vector([memory.pk])
+    return text
@@ -7,6 +7,9 @@ urlpatterns = [
     path('stories/', views.BedtimeStoriesView.as_view(), name='stories'),
     path('stories/create/', views.CreateBedtimeStoryView.as_view(), name='create_story'),
     path('stories/<uuid:pk>/', views.BedtimeStoryDetailView.as_view(), name='story_detail'),
+    path('stories/<uuid:pk>/stream/', views.BedtimeStoryStreamView.as_view(), name='story_stream'),
     path('generate-caption/', views.GenerateCaptionView.as_view(), name='generate_caption'),
+    path('generate-captions/', views.BatchCaptionView.as_view(), name='batch_caption'),
+    path('tasks/events/', views.AITaskEventsView.as_view(), name='task_events'),
     path('transcribe-audio/', views.TranscribeAudioView.as_view(), name='transcribe_audio'),
 ]
\ No newline at end of file
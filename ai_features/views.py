@@ -1,12 +1,28 @@
+from asgiref.sync import sync_to_async
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.shortcuts import render, get_object_or_404, redirect
-from django.views.generic import TemplateView, ListView
+from django.shortcuts import aget_object_or_404, render, get_object_or_404, redirect
+from django.views.generic import TemplateView, ListView, View
 from django.contrib import messages
-from django.http import JsonResponse
-from accounts.models import Child
+from django.http import JsonResponse, StreamingHttpResponse
+from django.urls import reverse
+from uuid import UUID
+from accounts.access import can_access_child, filter_accessible, get_accessible_children
+from .events import MAX_WATCHED_TASKS, task_event_stream
 from .models import BedtimeStory, AITask
 from .forms import BedtimeStoryForm
-from .tasks import generate_bedtime_story, generate_photo_caption, transcribe_audio_file
+from .story_stream import story_event_stream
+from accounts.models import Child
+from albums.models import Album
+from core.fair_queue import enqueue
+from memories.models import Memory
+from .tasks import generate_batch_captions, generate_bedtime_story, generate_photo_caption, transcribe_audio_file
+
+def event_stream_response(stream):
+    response = StreamingHttpResponse(stream, content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Stop nginx from buffering the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
 
 class BedtimeStoriesView(LoginRequiredMixin, ListView):
     model = BedtimeStory
@@ -16,15 +32,10 @@ class BedtimeStoriesView(LoginRequiredMixin, ListView):
     
     def get_queryset(self):
         child_id = self.request.GET.get('child')
-        queryset = BedtimeStory.objects.all()
+        queryset = BedtimeStory.objects.exclude(status='failed')
         
         # Filter by child access permissions
-        if self.request.user.is_owner:
-            children = Child.objects.filter(owner=self.request.user)
-        else:
-            children = self.request.user.children.all()
-        
-        queryset = queryset.filter(child__in=children)
+        queryset = filter_accessible(queryset, self.request.user)
         
         if child_id:
             queryset = queryset.filter(child_id=child_id)
@@ -33,10 +44,7 @@ class BedtimeStoriesView(LoginRequiredMixin, ListView):
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        if self.request.user.is_owner:
-            context['children'] = Child.objects.filter(owner=self.request.user)
-        else:
-            context['children'] = self.request.user.children.all()
+        context['children'] = get_accessible_children(self.request.user)
         context['current_child'] = self.request.GET.get('child')
         return context
 
@@ -48,10 +56,7 @@ class CreateBedtimeStoryView(LoginRequiredMixin, TemplateView):
         context['form'] = BedtimeStoryForm(user=self.request.user)
         
         # Check if any child has bedtime stories unlocked
-        if self.request.user.is_owner:
-            children = Child.objects.filter(owner=self.request.user)
-        else:
-            children = self.request.user.children.all()
+        children = get_accessible_children(self.request.user)
         
         unlocked_children = [child for child in children if child.has_feature('bedtime_stories')]
         
@@ -71,24 +76,35 @@ class CreateBedtimeStoryView(LoginRequiredMixin, TemplateView):
                 messages.error(request, "Bedtime story generator is not yet available for this child.")
                 return redirect('ai_features:stories')
             
+            # The story exists from the start so its page can show it as it is written
+            story = BedtimeStory.objects.create(
+                child=child,
+                title=f"A Special Story for {child.name}",
+                story_content='',
+                prompt_used=form.cleaned_data['story_prompt'],
+                created_by=request.user,
+                status='generating'
+            )
+            
             # Create AI task for story generation
             task = AITask.objects.create(
                 task_type='bedtime_story',
                 created_by=request.user,
                 input_data={
+                    'story_id': str(story.id),
                     'child_id': str(child.id),
                     'prompt': form.cleaned_data['story_prompt'],
                     'child_name': child.name,
                     'theme': form.cleaned_data.get('theme', ''),
-                    'length': form.cleaned_data.get('story_length', 'medium')
+                    'length': form.cleaned_data.get('story_length', 'medium'),
+                    'regenerate': form.cleaned_data.get('regenerate', False)
                 }
             )
             
-            # Trigger async task
-            generate_bedtime_story.delay(str(task.id))
+            # Queue behind other families' stories
+            enqueue(generate_bedtime_story, [str(task.id)], child.owner_id)
             
-            messages.success(request, "Your bedtime story is being generated! Check back in a few moments.")
-            return redirect('ai_features:stories')
+            return redirect('ai_features:story_detail', pk=story.pk)
         
         return render(request, self.template_name, {'form': form})
 
@@ -100,15 +116,28 @@ class BedtimeStoryDetailView(LoginRequiredMixin, TemplateView):
         story = get_object_or_404(BedtimeStory, pk=kwargs['pk'])
         
         # Check permissions
-        user = self.request.user
-        if not ((user.is_owner and story.child.owner == user) or 
-                story.child in user.children.all()):
+        if not can_access_child(self.request.user, story.child_id):
             messages.error(self.request, "You don't have permission to view this story.")
             return redirect('ai_features:stories')
         
         context['story'] = story
+        if story.status == 'generating':
+            context['stream_url'] = reverse('ai_features:story_stream', args=[story.pk])
         return context
 
+class BedtimeStoryStreamView(View):
+    """Server-Sent Events with a story's text as it is generated; async, so it needs the ASGI server"""
+    async def get(self, request, pk):
+        user = await request.auser()
+        if not user.is_authenticated:
+            return JsonResponse({'error': 'Authentication required'}, status=401)
+        
+        story = await aget_object_or_404(BedtimeStory.objects.only('id', 'child_id'), pk=pk)
+        if not await sync_to_async(can_access_child)(user, story.child_id):
+            return JsonResponse({'error': 'Permission denied'}, status=403)
+        
+        return event_stream_response(story_event_stream(story.pk))
+
 class GenerateCaptionView(LoginRequiredMixin, TemplateView):
     def post(self, request):
         memory_id = request.POST.get('memory_id')
@@ -116,15 +145,50 @@ class GenerateCaptionView(LoginRequiredMixin, TemplateView):
         if not memory_id:
             return JsonResponse({'error': 'Memory ID required'}, status=400)
         
+        memory = get_object_or_404(Memory.objects.select_related('child'), pk=memory_id)
+        if not can_access_child(request.user, memory.child_id):
+            return JsonResponse({'error': 'Permission denied'}, status=403)
+        
         # Create AI task for caption generation
         task = AITask.objects.create(
             task_type='caption',
             created_by=request.user,
-            input_data={'memory_id': memory_id}
+            input_data={'memory_id': memory_id, 'regenerate': request.POST.get('regenerate') == 'true'}
         )
         
-        # Trigger async task
-        generate_photo_caption.delay(str(task.id))
+        # Queue behind other families' captions
+        enqueue(generate_photo_caption, [str(task.id)], memory.child.owner_id)
+        
+        return JsonResponse({'task_id': str(task.id), 'status': 'processing'})
+
+class BatchCaptionView(LoginRequiredMixin, TemplateView):
+    def post(self, request):
+        album_id = request.POST.get('album_id')
+        child_id = request.POST.get('child_id')
+        
+        if album_id:
+            album = get_object_or_404(
+                filter_accessible(Album.objects.select_related('child'), request.user), pk=album_id
+            )
+            input_data = {'album_id': str(album.pk)}
+            family = album.child.owner_id
+        elif child_id and child_id.isdigit():
+            if not can_access_child(request.user, int(child_id)):
+                return JsonResponse({'error': 'Permission denied'}, status=403)
+            input_data = {'child_id': int(child_id)}
+            family = Child.objects.values_list('owner_id', flat=True).get(pk=child_id)
+        else:
+            return JsonResponse({'error': 'Album ID or child ID required'}, status=400)
+        
+        # Create AI task for the whole batch
+        task = AITask.objects.create(
+            task_type='batch_caption',
+            created_by=request.user,
+            input_data=input_data
+        )
+        
+        # Queue behind other families' batches
+        enqueue(generate_batch_captions, [str(task.id)], family)
         
         return JsonResponse({'task_id': str(task.id), 'status': 'processing'})
 
@@ -135,6 +199,10 @@ class TranscribeAudioView(LoginRequiredMixin, TemplateView):
         if not memory_id:
             return JsonResponse({'error': 'Memory ID required'}, status=400)
         
+        memory = get_object_or_404(Memory.objects.select_related('child'), pk=memory_id)
+        if not can_access_child(request.user, memory.child_id):
+            return JsonResponse({'error': 'Permission denied'}, status=403)
+        
         # Create AI task for transcription
         task = AITask.objects.create(
             task_type='transcription',
@@ -142,7 +210,27 @@ class TranscribeAudioView(LoginRequiredMixin, TemplateView):
             input_data={'memory_id': memory_id}
         )
         
-        # Trigger async task
-        transcribe_audio_file.delay(str(task.id))
+        # Queue behind other families' transcriptions
+        enqueue(transcribe_audio_file, [str(task.id)], memory.child.owner_id)
         
-        return JsonResponse({'task_id': str(task.id), 'status': 'processing'})
\ No newline at end of file
+        return JsonResponse({'task_id': str(task.id), 'status': 'processing'})
+
+class AITaskEventsView(View):
+    """
+    Server-Sent Events stream of status changes for up to MAX_WATCHED_TASKS tasks: ?ids=<uuid>,<uuid>
+    Async, so it needs the ASGI server; each open stream is a coroutine, not a worker thread.
+    """
+    async def get(self, request):
+        user = await request.auser()
+        if not user.is_authenticated:
+            return JsonResponse({'error': 'Authentication required'}, status=401)
+        
+        try:
+            task_ids = [str(UUID(value)) for value in request.GET.get('ids', '').split(',') if value]
+        except ValueError:
+            return JsonResponse({'error': 'ids must be task UUIDs'}, status=400)
+        
+        if not task_ids or len(task_ids) > MAX_WATCHED_TASKS:
+            return JsonResponse({'error': f'Watch between 1 and {MAX_WATCHED_TASKS} tasks'}, status=400)
+        
+        return event_stream_response(task_event_stream(user, task_ids))
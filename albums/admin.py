@@ -1,5 +1,6 @@
 from django.contrib import admin
 from .models import Album, AlbumMemory
+from .queries import memory_total
 
 class AlbumMemoryInline(admin.TabularInline):
     model = AlbumMemory
@@ -10,6 +11,9 @@ class AlbumAdmin(admin.ModelAdmin):
     list_filter = ['is_private', 'created_at']
     search_fields = ['title', 'description', 'child__name']
     inlines = [AlbumMemoryInline]
+    
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('child', 'created_by').annotate(memory_total=memory_total())
 
 class AlbumMemoryAdmin(admin.ModelAdmin):
     list_display = ['album', 'memory', 'order', 'added_by', 'added_at']
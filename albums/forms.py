@@ -1,6 +1,6 @@
 from django import forms
 from .models import Album
-from accounts.models import Child
+from accounts.access import accessible_children
 from memories.models import Memory
 
 class AlbumForm(forms.ModelForm):
@@ -16,10 +16,7 @@ class AlbumForm(forms.ModelForm):
         super().__init__(*args, **kwargs)
         
         if user:
-            if user.is_owner:
-                self.fields['child'].queryset = Child.objects.filter(owner=user)
-            else:
-                self.fields['child'].queryset = user.children.all()
+            self.fields['child'].queryset = accessible_children(user)
 
 class AddMemoriesToAlbumForm(forms.Form):
     memories = forms.ModelMultipleChoiceField(
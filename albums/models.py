@@ -1,5 +1,6 @@
 from django.db import models
 from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
 from accounts.models import Child
 from memories.models import Memory
 import uuid
@@ -25,7 +26,23 @@ class Album(models.Model):
     
     @property
     def memory_count(self):
-        return self.memories.count()
+        # Annotated by albums.queries.with_list_data
+        if hasattr(self, 'memory_total'):
+            return self.memory_total
+        return self.album_memories.count()
+    
+    @property
+    def cover_image_url(self):
+        """Card image of the cover memory, or of the first memory when no cover was chosen"""
+        if hasattr(self, 'cover_id'):
+            name = self.cover_thumbnail or self.cover_image
+            return default_storage.url(name) if name else ''
+        
+        cover = self.cover_memory
+        if cover is None:
+            entry = self.album_memories.select_related('memory').first()
+            cover = entry.memory if entry else None
+        return cover.card_image_url if cover else ''
 
 class AlbumMemory(models.Model):
     album = models.ForeignKey(Album, on_delete=models.CASCADE, related_name='album_memories')
@@ -0,0 +1,32 @@
+from django.db.models import CharField, Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from memories.models import Memory
+from .models import Album, AlbumMemory
+
+def memory_total():
+    """Correlated COUNT of the album's memories"""
+    entries = AlbumMemory.objects.filter(album=OuterRef('pk')).order_by().values('album')
+    return Coalesce(Subquery(entries.annotate(total=Count('*')).values('total')), 0)
+
+def _first_memory_id():
+    """The album's first memory in display order, its cover when none was chosen"""
+    entries = AlbumMemory.objects.filter(album=OuterRef('pk')).order_by('order', 'added_at')
+    return Subquery(entries.values('memory_id')[:1])
+
+def _cover_field(field):
+    cover = Memory.objects.filter(pk=OuterRef('cover_id'))
+    return Subquery(cover.values(field)[:1], output_field=CharField())
+
+def with_list_data(queryset=None):
+    """Albums with their memory count and cover image file names, in a single query"""
+    if queryset is None:
+        queryset = Album.objects.all()
+    
+    return queryset.select_related('child').annotate(
+        memory_total=memory_total(),
+        cover_id=Coalesce('cover_memory_id', _first_memory_id()),
+    ).annotate(
+        # The cover's card image lives on the memory row, so no rendition join is needed
+        cover_thumbnail=_cover_field('thumbnail'),
+        cover_image=_cover_field('image'),
+    )
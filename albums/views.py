@@ -2,10 +2,12 @@ from django.contrib.auth.mixins import LoginRequiredMixin
 from django.shortcuts import render, get_object_or_404, redirect
 from django.views.generic import TemplateView, ListView
 from django.contrib import messages
-from django.db.models import Q
-from accounts.models import Child
+from django.db.models import Prefetch, Q
+from accounts.access import can_access_child, filter_accessible, get_accessible_children
 from memories.models import Memory
+from memories.queries import with_card_data
 from .models import Album, AlbumMemory
+from .queries import memory_total, with_list_data
 from .forms import AlbumForm, AddMemoriesToAlbumForm
 
 class AlbumListView(LoginRequiredMixin, ListView):
@@ -16,15 +18,11 @@ class AlbumListView(LoginRequiredMixin, ListView):
     
     def get_queryset(self):
         child_id = self.request.GET.get('child')
-        queryset = Album.objects.all()
+        # Counts and cover images come with the page of albums, not per album
+        queryset = with_list_data()
         
         # Filter by child access permissions
-        if self.request.user.is_owner:
-            children = Child.objects.filter(owner=self.request.user)
-        else:
-            children = self.request.user.children.all()
-        
-        queryset = queryset.filter(child__in=children)
+        queryset = filter_accessible(queryset, self.request.user)
         
         if child_id:
             queryset = queryset.filter(child_id=child_id)
@@ -33,10 +31,7 @@ class AlbumListView(LoginRequiredMixin, ListView):
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        if self.request.user.is_owner:
-            context['children'] = Child.objects.filter(owner=self.request.user)
-        else:
-            context['children'] = self.request.user.children.all()
+        context['children'] = get_accessible_children(self.request.user)
         context['current_child'] = self.request.GET.get('child')
         return context
 
@@ -65,7 +60,7 @@ class AlbumDetailView(LoginRequiredMixin, TemplateView):
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        album = get_object_or_404(Album, pk=kwargs['pk'])
+        album = get_object_or_404(Album.objects.annotate(memory_total=memory_total()), pk=kwargs['pk'])
         
         # Check permissions
         if not self._has_permission(album):
@@ -73,13 +68,13 @@ class AlbumDetailView(LoginRequiredMixin, TemplateView):
             return redirect('albums:list')
         
         context['album'] = album
-        context['album_memories'] = album.album_memories.all()
+        context['album_memories'] = album.album_memories.prefetch_related(
+            Prefetch('memory', queryset=with_card_data())
+        )
         return context
     
     def _has_permission(self, album):
-        user = self.request.user
-        return (user.is_owner and album.child.owner == user) or \
-               album.child in user.children.all()
+        return can_access_child(self.request.user, album.child_id)
 
 class EditAlbumView(LoginRequiredMixin, TemplateView):
     template_name = 'albums/edit.html'
@@ -1,13 +1,20 @@
 from django.contrib import admin
-from .models import AppSettings, ExportJob
+from .models import AppSettings, ExportedItem, ExportJob
 
 class AppSettingsAdmin(admin.ModelAdmin):
     list_display = ['key', 'value', 'description', 'updated_at']
     search_fields = ['key', 'description']
 
 class ExportJobAdmin(admin.ModelAdmin):
-    list_display = ['child', 'requested_by', 'status', 'created_at', 'completed_at']
-    list_filter = ['status', 'created_at']
+    list_display = ['child', 'requested_by', 'mode', 'status', 'processed_items', 'total_items', 'created_at', 'completed_at']
+    list_filter = ['status', 'mode', 'created_at']
+    readonly_fields = ['base_export', 'since', 'watermark', 'total_items', 'processed_items', 'bytes_written', 'error_message', 'started_at', 'heartbeat_at', 'completed_at']
+
+class ExportedItemAdmin(admin.ModelAdmin):
+    list_display = ['child', 'kind', 'object_id', 'content_hash', 'export']
+    list_filter = ['kind']
+    search_fields = ['object_id']
 
 admin.site.register(AppSettings, AppSettingsAdmin)
-admin.site.register(ExportJob, ExportJobAdmin)
\ No newline at end of file
+admin.site.register(ExportJob, ExportJobAdmin)
+admin.site.register(ExportedItem, ExportedItemAdmin)
\ No newline at end of file
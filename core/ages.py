@@ -0,0 +1,73 @@
+from datetime import timedelta
+from memories.models import Memory
+from memories.queries import with_card_data
+from milestones.models import ChildMilestone, GrowthRecord
+
+# Models with a stored age_in_days, and the event date it is the child's age on
+AGE_FIELDS = [
+    (Memory, 'memory_date'),
+    (ChildMilestone, 'achieved_date'),
+    (GrowthRecord, 'measurement_date'),
+]
+
+# How far either side of an age the "at this age" view looks
+AGE_WINDOW_DAYS = 15
+MAX_AGE_WINDOW_DAYS = 90
+
+def recompute_ages(model, date_field, queryset=None, batch_size=1000):
+    """Rewrite age_in_days from each row's event date in PK batches, yielding the running total"""
+    if queryset is None:
+        queryset = model.objects.all()
+    queryset = queryset.select_related('child').order_by('pk').only('pk', date_field, 'child__birth_date')
+    total = 0
+    last_pk = None
+    
+    while True:
+        batch = queryset
+        if last_pk is not None:
+            batch = batch.filter(pk__gt=last_pk)
+        rows = list(batch[:batch_size])
+        if not rows:
+            break
+        
+        for row in rows:
+            row.age_in_days = row.child.days_old_at(getattr(row, date_field))
+        # bulk_update() leaves updated_at alone; an age is not an edit
+        model.objects.bulk_update(rows, ['age_in_days'])
+        
+        total += len(rows)
+        last_pk = rows[-1].pk
+        yield total
+
+def recompute_child_ages(child_id):
+    """Bring every stored age of one child up to date, after their birth date changed"""
+    for model, date_field in AGE_FIELDS:
+        for _ in recompute_ages(model, date_field, model.objects.filter(child_id=child_id)):
+            pass
+
+def at_age(children, age_in_days, window=AGE_WINDOW_DAYS):
+    """
+    Memories and milestones of each child from around the same age, for side-by-side comparison.
+    One range query per model over the (child, age_in_days) indexes.
+    """
+    child_ids = [child.id for child in children]
+    age_range = (age_in_days - window, age_in_days + window)
+    memories = with_card_data(Memory.objects.filter(child_id__in=child_ids, age_in_days__range=age_range))
+    milestones = ChildMilestone.objects.filter(
+        child_id__in=child_ids, age_in_days__range=age_range
+    ).select_related('predefined_milestone')
+    
+    columns = {
+        child.id: {
+            'child': child,
+            'date': child.birth_date + timedelta(days=age_in_days),
+            'memories': [],
+            'milestones': [],
+        }
+        for child in children
+    }
+    for memory in memories.order_by('age_in_days', 'memory_date'):
+        columns[memory.child_id]['memories'].append(memory)
+    for milestone in milestones.order_by('age_in_days', 'achieved_date'):
+        columns[milestone.child_id]['milestones'].append(milestone)
+    return list(columns.values())
@@ -1,16 +1,13 @@
-from accounts.models import Child
+from accounts.access import get_accessible_children
 
 def child_context(request):
     """Add child information to template context"""
     if not request.user.is_authenticated:
         return {}
     
-    if request.user.is_owner:
-        children = Child.objects.filter(owner=request.user)
-    else:
-        children = request.user.children.all()
+    children = get_accessible_children(request.user)
     
     return {
         'user_children': children,
-        'primary_child': children.first() if children.exists() else None,
+        'primary_child': children[0] if children else None,
     }
\ No newline at end of file
@@ -0,0 +1,71 @@
+import hashlib
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+from accounts.models import Child
+from ai_features.models import BedtimeStory
+from albums.models import Album
+from memories.models import Memory
+from memories.queries import with_card_data
+from milestones.models import ChildMilestone
+
+# Summaries are keyed on per-child versions, so writes invalidate them
+# immediately; the timeout only bounds how long unreachable entries linger
+SUMMARY_TIMEOUT = 60 * 60
+RECENT_MEMORY_COUNT = 5
+
+def _version_key(child_id):
+    return f"dashboard:child-version:{child_id}"
+
+def _bump_version(child_id):
+    try:
+        cache.incr(_version_key(child_id))
+    except ValueError:
+        cache.set(_version_key(child_id), 1, None)
+
+def touch_child(child_id):
+    """Invalidate every dashboard summary that includes this child, once the current transaction commits"""
+    # Bumping before commit lets a concurrent request cache pre-commit counts under the new version
+    transaction.on_commit(lambda: _bump_version(child_id))
+
+def _summary_key(user, child_ids):
+    versions = cache.get_many([_version_key(child_id) for child_id in child_ids])
+    fingerprint = ','.join(f"{child_id}:{versions.get(_version_key(child_id), 0)}" for child_id in child_ids)
+    digest = hashlib.md5(fingerprint.encode()).hexdigest()
+    return f"dashboard:summary:{user.pk}:{digest}"
+
+def _count_per_child(model):
+    counts = model.objects.filter(child=OuterRef('pk')).order_by().values('child')
+    return Coalesce(Subquery(counts.annotate(total=Count('*')).values('total')), 0)
+
+def build_dashboard_summary(child_ids):
+    """Stats for all children from one aggregate query, plus the recent memory cards"""
+    stats = Child.objects.filter(id__in=child_ids).annotate(
+        memory_count=_count_per_child(Memory),
+        milestone_count=_count_per_child(ChildMilestone),
+        album_count=_count_per_child(Album),
+        story_count=_count_per_child(BedtimeStory),
+    ).aggregate(
+        memories=Coalesce(Sum('memory_count'), 0),
+        milestones=Coalesce(Sum('milestone_count'), 0),
+        albums=Coalesce(Sum('album_count'), 0),
+        stories=Coalesce(Sum('story_count'), 0),
+    )
+    
+    recent_memories = list(with_card_data(Memory.objects.filter(child_id__in=child_ids))[:RECENT_MEMORY_COUNT])
+    
+    return {
+        'stats': stats,
+        'recent_memories': recent_memories,
+    }
+
+def get_dashboard_summary(user, child_ids):
+    """Cached summary for the user's children; built on a miss"""
+    child_ids = sorted(child_ids)
+    key = _summary_key(user, child_ids)
+    summary = cache.get(key)
+    if summary is None:
+        summary = build_dashboard_summary(child_ids)
+        cache.set(key, summary, SUMMARY_TIMEOUT)
+    return summary
\ No newline at end of file
@@ -0,0 +1,434 @@
+import hashlib
+import io
+import json
+import logging
+import tempfile
+import time
+import zipfile
+from collections import defaultdict, namedtuple
+from datetime import timedelta
+from functools import lru_cache
+from itertools import islice
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import CharField, Q
+from django.db.models.functions import Cast
+from django.utils import timezone
+from ai_features.models import BedtimeStory
+from albums.models import Album, AlbumMemory
+from memories.models import Memory, MemoryComment
+from milestones.models import ChildMilestone, GrowthRecord
+from .fair_queue import renew_current_slot
+from .models import ExportedItem, ExportJob
+
+logger = logging.getLogger(__name__)
+
+# Minimum seconds between progress writes to the ExportJob row
+PROGRESS_INTERVAL = 2
+ROW_BATCH_SIZE = 500
+MEDIA_PREFIX = 'media/'
+
+# Incremental exports re-read rows saved shortly before the previous watermark,
+# so a transaction that committed late is not missed; the manifest drops repeats
+WATERMARK_OVERLAP = timedelta(minutes=5)
+
+MEMORY_FIELDS = [
+    'id', 'title', 'content', 'memory_type', 'image', 'video', 'audio', 'memory_date', 'tags',
+    'location', 'latitude', 'longitude', 'ai_caption', 'transcription', 'is_milestone',
+    'is_private', 'created_by__username', 'created_at', 'updated_at',
+]
+COMMENT_FIELDS = ['id', 'memory_id', 'user__username', 'content', 'created_at', 'updated_at']
+MILESTONE_FIELDS = [
+    'id', 'predefined_milestone__title', 'custom_title', 'description', 'achieved_date',
+    'age_at_achievement', 'notes', 'photo', 'is_custom', 'recorded_by__username',
+    'created_at', 'updated_at',
+]
+GROWTH_FIELDS = [
+    'id', 'measurement_type', 'value', 'measurement_date', 'age_at_measurement', 'notes',
+    'recorded_by__username', 'created_at',
+]
+ALBUM_FIELDS = [
+    'id', 'title', 'description', 'cover_memory_id', 'is_private', 'created_by__username',
+    'created_at', 'updated_at',
+]
+ALBUM_MEMORY_FIELDS = ['id', 'album_id', 'memory_id', 'order', 'added_at']
+STORY_FIELDS = ['id', 'title', 'story_content', 'prompt_used', 'is_favorite', 'created_by__username', 'created_at']
+
+# changed_field is the watermark column; sections without one are small tables
+# whose edits leave no timestamp, so they are rescanned and filtered by hash
+ExportSection = namedtuple('ExportSection', 'kind entry queryset fields file_fields changed_field')
+
+def export_sections(child):
+    return [
+        ExportSection('memory', 'memories.json', Memory.objects.filter(child=child),
+                      MEMORY_FIELDS, ['image', 'video', 'audio'], 'updated_at'),
+        ExportSection('comment', 'comments.json', MemoryComment.objects.filter(memory__child=child),
+                      COMMENT_FIELDS, [], 'updated_at'),
+        ExportSection('milestone', 'milestones.json', ChildMilestone.objects.filter(child=child),
+                      MILESTONE_FIELDS, ['photo'], 'updated_at'),
+        ExportSection('growth_record', 'growth_records.json', GrowthRecord.objects.filter(child=child),
+                      GROWTH_FIELDS, [], None),
+        ExportSection('album', 'albums.json', Album.objects.filter(child=child),
+                      ALBUM_FIELDS, [], 'updated_at'),
+        ExportSection('album_memory', 'album_memories.json', AlbumMemory.objects.filter(album__child=child),
+                      ALBUM_MEMORY_FIELDS, [], None),
+        ExportSection('story', 'stories.json', BedtimeStory.objects.filter(child=child),
+                      STORY_FIELDS, [], None),
+    ]
+
+def changed_rows(section, since):
+    """The section's rows that may have changed after the watermark (all rows for full exports)"""
+    queryset = section.queryset
+    if since is not None and section.changed_field:
+        queryset = queryset.filter(**{f"{section.changed_field}__gt": since - WATERMARK_OVERLAP})
+    return queryset
+
+def live_media_names(child):
+    """Subqueries of every storage name still referenced by the child's rows"""
+    memories = Memory.objects.filter(child=child)
+    photos = ChildMilestone.objects.filter(child=child)
+    return [
+        memories.exclude(image__isnull=True).exclude(image='').values('image'),
+        memories.exclude(video__isnull=True).exclude(video='').values('video'),
+        memories.exclude(audio__isnull=True).exclude(audio='').values('audio'),
+        photos.exclude(photo__isnull=True).exclude(photo='').values('photo'),
+    ]
+
+def media_names(child, since=None):
+    """Storage names of the original media files of rows changed after the watermark, without loading rows"""
+    if child.avatar:
+        yield child.avatar.name
+    memories = Memory.objects.filter(child=child)
+    photos = ChildMilestone.objects.filter(child=child)
+    if since is not None:
+        memories = memories.filter(updated_at__gt=since - WATERMARK_OVERLAP)
+        photos = photos.filter(updated_at__gt=since - WATERMARK_OVERLAP)
+    for row in memories.values_list('image', 'video', 'audio').iterator(ROW_BATCH_SIZE):
+        yield from (name for name in row if name)
+    photos = photos.exclude(photo='').exclude(photo__isnull=True)
+    yield from photos.values_list('photo', flat=True).iterator(ROW_BATCH_SIZE)
+
+def batched(iterable, size=ROW_BATCH_SIZE):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+def known_hashes(child, kind, object_ids):
+    return dict(ExportedItem.objects.filter(
+        child=child, kind=kind, object_id__in=object_ids
+    ).values_list('object_id', 'content_hash'))
+
+def row_hash(row):
+    return hashlib.sha256(json.dumps(row, cls=DjangoJSONEncoder, sort_keys=True).encode()).hexdigest()
+
+@lru_cache(maxsize=1)
+def _s3_client():
+    import boto3
+    return boto3.client(
+        's3',
+        region_name=settings.AWS_S3_REGION_NAME,
+        aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
+        aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
+    )
+
+def open_media(name):
+    """A readable stream of a stored file, or None if it is missing; S3 objects are streamed, not downloaded first"""
+    if settings.USE_S3:
+        client = _s3_client()
+        try:
+            return client.get_object(Bucket=settings.AWS_STORAGE_BUCKET_NAME, Key=name)['Body']
+        except client.exceptions.NoSuchKey:
+            return None
+    try:
+        return default_storage.open(name, 'rb')
+    except FileNotFoundError:
+        return None
+
+class ExportProgress:
+    """Counts written items and bytes, flushing them to the job row at most every PROGRESS_INTERVAL"""
+    def __init__(self, job):
+        self.job = job
+        self.last_flush = 0
+    
+    def add(self, items=0, bytes_written=0):
+        self.job.processed_items += items
+        self.job.bytes_written += bytes_written
+        if time.monotonic() - self.last_flush >= PROGRESS_INTERVAL:
+            self.flush()
+    
+    def flush(self):
+        ExportJob.objects.filter(pk=self.job.pk).update(
+            processed_items=self.job.processed_items,
+            bytes_written=self.job.bytes_written,
+            heartbeat_at=timezone.now(),
+        )
+        # Progress is proof of life; keep the fair-queue slot leased
+        renew_current_slot()
+        self.last_flush = time.monotonic()
+
+class ManifestChanges:
+    """Manifest updates of the export being built, spooled to disk and applied only once it completes"""
+    def __init__(self):
+        self.file = tempfile.TemporaryFile('w+', encoding='utf-8', dir=settings.EXPORT_TEMP_DIR)
+        self.exported = 0
+        self.deleted = 0
+    
+    def export(self, kind, object_id, content_hash):
+        self.file.write(json.dumps(['export', kind, object_id, content_hash]) + '\n')
+        self.exported += 1
+    
+    def delete(self, kind, object_id):
+        self.file.write(json.dumps(['delete', kind, object_id, None]) + '\n')
+        self.deleted += 1
+    
+    def __iter__(self):
+        self.file.seek(0)
+        for line in self.file:
+            yield json.loads(line)
+        self.file.seek(0, io.SEEK_END)
+    
+    def close(self):
+        self.file.close()
+    
+    def apply(self, child, job):
+        for batch in batched(self):
+            # One row per item: ON CONFLICT DO UPDATE cannot touch the same row twice in a statement
+            exported = {
+                (kind, object_id): ExportedItem(
+                    child=child, kind=kind, object_id=object_id, content_hash=content_hash, export=job
+                )
+                for action, kind, object_id, content_hash in batch if action == 'export'
+            }
+            ExportedItem.objects.bulk_create(
+                exported.values(),
+                update_conflicts=True,
+                unique_fields=['child', 'kind', 'object_id'],
+                update_fields=['content_hash', 'export'],
+            )
+            deleted = defaultdict(list)
+            for action, kind, object_id, _ in batch:
+                if action == 'delete':
+                    deleted[kind].append(object_id)
+            for kind, object_ids in deleted.items():
+                ExportedItem.objects.filter(child=child, kind=kind, object_id__in=object_ids).delete()
+
+class JsonArrayEntry:
+    """A JSON array written to the archive one element at a time"""
+    def __init__(self, archive, name):
+        info = zipfile.ZipInfo(name, date_time=timezone.now().timetuple()[:6])
+        info.compress_type = zipfile.ZIP_DEFLATED
+        self.raw = archive.open(info, 'w', force_zip64=True)
+        self.out = io.TextIOWrapper(self.raw, encoding='utf-8')
+        self.count = 0
+    
+    def __enter__(self):
+        self.out.write('[')
+        return self
+    
+    def write(self, item):
+        self.out.write(',\n' if self.count else '\n')
+        self.out.write(json.dumps(item, cls=DjangoJSONEncoder))
+        self.count += 1
+    
+    def __exit__(self, *exc_info):
+        self.out.write('\n]\n')
+        self.out.flush()
+        self.out.detach()
+        self.raw.close()
+
+def write_section(archive, section, since, changes, progress):
+    """Stream new and changed rows into the section's JSON entry, a batch of rows at a time"""
+    rows = changed_rows(section, since).order_by('pk').values(*section.fields).iterator(ROW_BATCH_SIZE)
+    with JsonArrayEntry(archive, section.entry) as entry:
+        for batch in batched(rows):
+            # A full archive lists every row in its manifest, whatever earlier exports held
+            object_ids = [str(row['id']) for row in batch]
+            known = known_hashes(progress.job.child, section.kind, object_ids) if since is not None else {}
+            for row in batch:
+                for field in section.file_fields:
+                    row[field] = MEDIA_PREFIX + row[field] if row[field] else None
+                object_id, digest = str(row['id']), row_hash(row)
+                if known.get(object_id) == digest:
+                    # Unchanged since the last export, e.g. a row re-read in the overlap window
+                    progress.add(items=1)
+                    continue
+                changes.export(section.kind, object_id, digest)
+                entry.write(row)
+                progress.add(items=1)
+
+def write_media_entry(archive, name, changes, progress):
+    """Copy one stored file into the archive in EXPORT_CHUNK_SIZE blocks, hashing it on the way"""
+    info = zipfile.ZipInfo(MEDIA_PREFIX + name, date_time=timezone.now().timetuple()[:6])
+    # Photos, video and audio are already compressed
+    info.compress_type = zipfile.ZIP_STORED
+    source = open_media(name)
+    if source is None:
+        logger.warning(f"Skipping missing media file {name} in export {progress.job.pk}")
+        progress.add(items=1)
+        return
+    
+    digest = hashlib.sha256()
+    try:
+        with archive.open(info, 'w', force_zip64=True) as target:
+            while True:
+                block = source.read(settings.EXPORT_CHUNK_SIZE)
+                if not block:
+                    break
+                target.write(block)
+                digest.update(block)
+                progress.add(bytes_written=len(block))
+    finally:
+        source.close()
+    changes.export('media', name, digest.hexdigest())
+    progress.add(items=1)
+
+def write_media(archive, child, since, changes, progress):
+    """Media of changed rows; storage names are unique per upload, so a known name is already exported"""
+    # Several rows can share a file, in different batches; each name is written once per archive
+    seen = set()
+    for batch in batched(media_names(child, since)):
+        known = known_hashes(child, 'media', batch) if since is not None else {}
+        for name in batch:
+            if name in known or name in seen:
+                progress.add(items=1)
+                continue
+            seen.add(name)
+            write_media_entry(archive, name, changes, progress)
+
+def write_tombstones(archive, child, changes):
+    """List manifest entries whose rows or files no longer exist, so restores can delete them"""
+    with JsonArrayEntry(archive, 'deleted.json') as entry:
+        for section in export_sections(child):
+            live = section.queryset.annotate(object_key=Cast('pk', CharField())).values('object_key')
+            stale = ExportedItem.objects.filter(child=child, kind=section.kind).exclude(object_id__in=live)
+            for object_id in stale.values_list('object_id', flat=True).iterator(ROW_BATCH_SIZE):
+                entry.write({'kind': section.kind, 'id': object_id})
+                changes.delete(section.kind, object_id)
+        
+        stale = ExportedItem.objects.filter(child=child, kind='media')
+        for names in live_media_names(child):
+            stale = stale.exclude(object_id__in=names)
+        if child.avatar:
+            stale = stale.exclude(object_id=child.avatar.name)
+        for name in stale.values_list('object_id', flat=True).iterator(ROW_BATCH_SIZE):
+            entry.write({'kind': 'media', 'id': MEDIA_PREFIX + name})
+            changes.delete('media', name)
+
+def write_manifest(archive, job, changes):
+    """Content hashes of everything in this archive, plus the watermarks it covers"""
+    info = zipfile.ZipInfo('manifest.json', date_time=timezone.now().timetuple()[:6])
+    info.compress_type = zipfile.ZIP_DEFLATED
+    with archive.open(info, 'w', force_zip64=True) as raw:
+        out = io.TextIOWrapper(raw, encoding='utf-8')
+        header = json.dumps({
+            'mode': job.mode,
+            'base_export': job.base_export_id,
+            'since': job.since,
+            'watermark': job.watermark,
+            'deleted': changes.deleted,
+        }, cls=DjangoJSONEncoder)
+        out.write(header[:-1] + ', "items": [')
+        first = True
+        for action, kind, object_id, content_hash in changes:
+            if action != 'export':
+                continue
+            path = MEDIA_PREFIX + object_id if kind == 'media' else object_id
+            out.write(('\n' if first else ',\n') + json.dumps({'kind': kind, 'id': path, 'sha256': content_hash}))
+            first = False
+        out.write('\n]}\n')
+        out.flush()
+        out.detach()
+
+def count_items(child, since):
+    total = sum(changed_rows(section, since).count() for section in export_sections(child))
+    return total + sum(1 for _ in media_names(child, since))
+
+def stale_exports():
+    """Exports left 'processing' by a worker that stopped writing progress for longer than the exports lease"""
+    cutoff = timezone.now() - timedelta(seconds=settings.FAIR_QUEUE_SLOT_TIMEOUTS['exports'])
+    return Q(status='processing') & (
+        Q(heartbeat_at__lt=cutoff) | Q(heartbeat_at__isnull=True, started_at__lt=cutoff)
+    )
+
+def start_export(child, user, incremental=False):
+    """Queue an export, reusing one still being built; incremental exports start at the last completed one"""
+    # A worker killed mid-build (OOM, lost node) leaves its job 'processing' for good
+    ExportJob.objects.filter(stale_exports(), child=child).update(
+        status='failed', error_message="The export stopped making progress"
+    )
+    job = ExportJob.objects.filter(child=child, status__in=['pending', 'processing']).first()
+    if job is not None:
+        return job
+    
+    base = None
+    if incremental:
+        base = ExportJob.objects.filter(
+            child=child, status='completed', watermark__isnull=False
+        ).order_by('-watermark').first()
+    
+    from .fair_queue import enqueue
+    from .tasks import export_child_data
+    with transaction.atomic():
+        job = ExportJob.objects.create(
+            child=child,
+            requested_by=user,
+            mode='incremental' if base else 'full',
+            base_export=base,
+            since=base.watermark if base else None,
+        )
+        job_id = job.pk
+        transaction.on_commit(lambda: enqueue(export_child_data, [job_id], child.owner_id))
+    return job
+
+def build_export(job):
+    """Write the child's data and media to a ZIP64 archive and attach it to the job"""
+    child = job.child
+    since = job.since if job.mode == 'incremental' else None
+    job.watermark = timezone.now()
+    job.total_items = count_items(child, since)
+    job.processed_items = 0
+    job.bytes_written = 0
+    ExportJob.objects.filter(pk=job.pk).update(
+        watermark=job.watermark, total_items=job.total_items, processed_items=0, bytes_written=0,
+        heartbeat_at=timezone.now(),
+    )
+    progress = ExportProgress(job)
+    changes = ManifestChanges()
+    
+    try:
+        with tempfile.TemporaryFile(dir=settings.EXPORT_TEMP_DIR) as spool:
+            with zipfile.ZipFile(spool, 'w', allowZip64=True) as archive:
+                archive.writestr('child.json', json.dumps({
+                    'id': child.pk,
+                    'name': child.name,
+                    'birth_date': child.birth_date,
+                    'birth_time': child.birth_time,
+                    'birth_location': child.birth_location,
+                    'avatar': MEDIA_PREFIX + child.avatar.name if child.avatar else None,
+                    'exported_at': timezone.now(),
+                }, cls=DjangoJSONEncoder, indent=2))
+                
+                for section in export_sections(child):
+                    write_section(archive, section, since, changes, progress)
+                write_media(archive, child, since, changes, progress)
+                write_tombstones(archive, child, changes)
+                write_manifest(archive, job, changes)
+            
+            progress.flush()
+            spool.seek(0)
+            kind = 'changes' if since is not None else 'full'
+            filename = f"{child.name}-{kind}-{job.watermark:%Y%m%d-%H%M%S}.zip"
+            job.export_file.save(filename, File(spool), save=False)
+        
+        # The manifest only moves forward together with a completed export
+        with transaction.atomic():
+            changes.apply(child, job)
+            job.status = 'completed'
+            job.completed_at = timezone.now()
+            job.save(update_fields=['export_file', 'status', 'completed_at'])
+    finally:
+        changes.close()
+    return job
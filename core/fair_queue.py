@@ -0,0 +1,119 @@
+import json
+import time
+import uuid
+import redis
+from celery import current_app, current_task
+from celery.signals import task_postrun
+from django.conf import settings
+
+# Per queue:
+#   fair:<queue>:family:<id>  list of jobs waiting for that family
+#   fair:<queue>:ring         families with waiting jobs, in round-robin order
+#   fair:<queue>:inflight     sorted set of dispatched job ids, scored by lease expiry
+
+# Append a job; a family joins the ring when its list goes from empty to non-empty
+ENQUEUE_SCRIPT = """
+if redis.call('RPUSH', KEYS[1], ARGV[1]) == 1 then
+    redis.call('RPUSH', KEYS[2], ARGV[2])
+end
+"""
+
+# Take the next family's oldest job if a slot is free; the family goes to the
+# back of the ring while it still has jobs waiting
+DISPATCH_SCRIPT = """
+redis.call('ZREMRANGEBYSCORE', KEYS[2], '-inf', ARGV[2])
+if redis.call('ZCARD', KEYS[2]) >= tonumber(ARGV[1]) then
+    return false
+end
+local family = redis.call('LPOP', KEYS[1])
+if not family then
+    return false
+end
+local family_key = ARGV[4] .. family
+local job = redis.call('LPOP', family_key)
+if redis.call('LLEN', family_key) > 0 then
+    redis.call('RPUSH', KEYS[1], family)
+end
+if not job then
+    return false
+end
+redis.call('ZADD', KEYS[2], ARGV[3], cjson.decode(job)['id'])
+return job
+"""
+
+_client = None
+
+def redis_client():
+    global _client
+    if _client is None:
+        _client = redis.Redis.from_url(settings.CELERY_BROKER_URL)
+    return _client
+
+def _key(queue, name):
+    return f"fair:{queue}:{name}"
+
+def queue_for(task_name):
+    return settings.CELERY_TASK_ROUTES.get(task_name, {}).get('queue')
+
+def enqueue(task, args, family):
+    """
+    Queue a task behind other families' work in its queue, rather than sending it straight to Celery.
+    `family` is the child's owner ID; tasks on queues without fair slots are sent directly.
+    """
+    queue = queue_for(task.name)
+    if queue not in settings.FAIR_QUEUE_SLOTS:
+        return task.apply_async(args)
+
+    job = json.dumps({'id': str(uuid.uuid4()), 'task': task.name, 'args': args})
+    redis_client().eval(
+        ENQUEUE_SCRIPT, 2,
+        _key(queue, f"family:{family}"), _key(queue, 'ring'),
+        job, family,
+    )
+    dispatch(queue)
+
+def dispatch(queue):
+    """Send waiting jobs to Celery round-robin across families until the queue's slots are full"""
+    client = redis_client()
+    sent = 0
+    while True:
+        now = time.time()
+        job = client.eval(
+            DISPATCH_SCRIPT, 2,
+            _key(queue, 'ring'), _key(queue, 'inflight'),
+            settings.FAIR_QUEUE_SLOTS[queue], now, now + settings.FAIR_QUEUE_SLOT_TIMEOUTS[queue],
+            _key(queue, 'family:'),
+        )
+        if not job:
+            return sent
+        job = json.loads(job)
+        current_app.send_task(job['task'], args=job['args'], task_id=job['id'], queue=queue)
+        sent += 1
+
+def release(queue, job_id):
+    """Free a finished job's slot and hand it to the next family in line"""
+    redis_client().zrem(_key(queue, 'inflight'), job_id)
+    dispatch(queue)
+
+def renew(queue, job_id):
+    """Extend a running job's lease; XX so a slot already released is not taken again"""
+    expires = time.time() + settings.FAIR_QUEUE_SLOT_TIMEOUTS[queue]
+    redis_client().zadd(_key(queue, 'inflight'), {job_id: expires}, xx=True)
+
+def renew_current_slot():
+    """Called by long-running tasks as they make progress, so their slot is not reclaimed while busy"""
+    task = current_task
+    if task is None or not task.request.id:
+        return
+    queue = queue_for(task.name)
+    if queue in settings.FAIR_QUEUE_SLOTS:
+        renew(queue, task.request.id)
+
+def dispatch_all():
+    return {queue: dispatch(queue) for queue in settings.FAIR_QUEUE_SLOTS}
+
+@task_postrun.connect
+def release_fair_slot(sender=None, task_id=None, **kwargs):
+    queue = queue_for(sender.name) if sender else None
+    if queue in settings.FAIR_QUEUE_SLOTS:
+        release(queue, task_id)
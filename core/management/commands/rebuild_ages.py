@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from core.ages import AGE_FIELDS, recompute_ages
+
+class Command(BaseCommand):
+    help = 'Backfill the age_in_days column of memories, milestones and growth records'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--missing-only', action='store_true', help='Only rows without an age yet')
+    
+    def handle(self, *args, **options):
+        for model, date_field in AGE_FIELDS:
+            queryset = model.objects.all()
+            if options['missing_only']:
+                queryset = queryset.filter(age_in_days__isnull=True)
+            
+            total = 0
+            for total in recompute_ages(model, date_field, queryset, options['batch_size']):
+                self.stdout.write(f"Computed ages for {total} {model._meta.verbose_name_plural}...")
+            
+            self.stdout.write(self.style.SUCCESS(f"Ages rebuilt for {total} {model._meta.verbose_name_plural}"))
@@ -18,12 +18,55 @@ class ExportJob(models.Model):
         ('failed', 'Failed'),
     ]
     
+    MODE_CHOICES = [
+        ('full', 'Full'),
+        ('incremental', 'Changes since last export'),
+    ]
+    
     child = models.ForeignKey('accounts.Child', on_delete=models.CASCADE)
     requested_by = models.ForeignKey('accounts.User', on_delete=models.CASCADE)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
     export_file = models.FileField(upload_to='exports/', null=True, blank=True)
+    
+    # Incremental exports package what changed after the base export's watermark
+    mode = models.CharField(max_length=20, choices=MODE_CHOICES, default='full')
+    base_export = models.ForeignKey('self', on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    since = models.DateTimeField(null=True, blank=True)
+    watermark = models.DateTimeField(null=True, blank=True, help_text="When the data in this export was read")
+    
+    # Progress, written by core.exports while the archive is being built
+    total_items = models.PositiveIntegerField(default=0)
+    processed_items = models.PositiveIntegerField(default=0)
+    bytes_written = models.BigIntegerField(default=0)
+    heartbeat_at = models.DateTimeField(null=True, blank=True, help_text="Last progress write of the worker building it")
+    error_message = models.TextField(blank=True)
+    
     created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
     completed_at = models.DateTimeField(null=True, blank=True)
     
     def __str__(self):
-        return f"Export for {self.child.name} - {self.status}"
\ No newline at end of file
+        return f"Export for {self.child.name} - {self.status}"
+    
+    @property
+    def progress(self):
+        """Percentage of rows and media files written to the archive"""
+        if self.status == 'completed':
+            return 100
+        if not self.total_items:
+            return 0
+        return min(99, self.processed_items * 100 // self.total_items)
+
+class ExportedItem(models.Model):
+    """Content hash of a row or media file as of the last completed export of its child"""
+    child = models.ForeignKey('accounts.Child', on_delete=models.CASCADE, related_name='exported_items')
+    kind = models.CharField(max_length=20)
+    object_id = models.CharField(max_length=500, help_text="Primary key, or storage name for media")
+    content_hash = models.CharField(max_length=64)
+    export = models.ForeignKey(ExportJob, on_delete=models.SET_NULL, null=True, related_name='+')
+    
+    class Meta:
+        unique_together = ['child', 'kind', 'object_id']
+    
+    def __str__(self):
+        return f"{self.kind} {self.object_id} ({self.content_hash[:12]})"
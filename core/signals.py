@@ -0,0 +1,19 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from ai_features.models import BedtimeStory
+from albums.models import Album
+from memories.models import Memory
+from milestones.models import ChildMilestone
+from .dashboard import touch_child
+
+@receiver(post_save, sender=Memory)
+@receiver(post_delete, sender=Memory)
+@receiver(post_save, sender=ChildMilestone)
+@receiver(post_delete, sender=ChildMilestone)
+@receiver(post_save, sender=Album)
+@receiver(post_delete, sender=Album)
+@receiver(post_save, sender=BedtimeStory)
+@receiver(post_delete, sender=BedtimeStory)
+def invalidate_dashboard_summary(sender, instance, **kwargs):
+    """A write to any counted model changes its child's dashboard numbers"""
+    touch_child(instance.child_id)
\ No newline at end of file
@@ -0,0 +1,32 @@
+from celery import shared_task
+from django.db.models import Q
+from django.utils import timezone
+from .exports import build_export, stale_exports
+from .fair_queue import dispatch_all
+from .models import ExportJob
+import logging
+
+logger = logging.getLogger(__name__)
+
+@shared_task
+def export_child_data(job_id):
+    """Build the ZIP archive for an ExportJob"""
+    # Claim the job; a redelivered task takes over one whose worker died mid-build
+    now = timezone.now()
+    claimed = ExportJob.objects.filter(Q(status='pending') | stale_exports(), pk=job_id).update(
+        status='processing', started_at=now, heartbeat_at=now
+    )
+    if not claimed:
+        return
+    job = ExportJob.objects.select_related('child').get(id=job_id)
+    
+    try:
+        build_export(job)
+    except Exception as e:
+        logger.error(f"Error building export {job_id}: {e}")
+        ExportJob.objects.filter(pk=job.pk).update(status='failed', error_message=str(e))
+
+@shared_task
+def pump_fair_queues():
+    """Release waiting jobs into slots freed by expiry rather than by a finished task"""
+    return dispatch_all()
@@ -0,0 +1,40 @@
+from datetime import date, timedelta
+from django.conf import settings
+from django.test import TestCase
+from django.utils import timezone
+from accounts.models import Child, User
+from .exports import start_export
+from .models import ExportJob
+
+class StartExportTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='parent', password='secret')
+        self.child = Child.objects.create(name='Ada', birth_date=date(2022, 1, 1), owner=self.user)
+    
+    def test_stuck_processing_job_does_not_block_a_new_export(self):
+        lease = timedelta(seconds=settings.FAIR_QUEUE_SLOT_TIMEOUTS['exports'])
+        stuck = ExportJob.objects.create(
+            child=self.child,
+            requested_by=self.user,
+            status='processing',
+            started_at=timezone.now() - 3 * lease,
+            heartbeat_at=timezone.now() - 2 * lease,
+        )
+        
+        job = start_export(self.child, self.user)
+        
+        self.assertNotEqual(job.pk, stuck.pk)
+        self.assertEqual(job.status, 'pending')
+        stuck.refresh_from_db()
+        self.assertEqual(stuck.status, 'failed')
+    
+    def test_live_processing_job_is_reused(self):
+        live = ExportJob.objects.create(
+            child=self.child,
+            requested_by=self.user,
+            status='processing',
+            started_at=timezone.now() - timedelta(hours=5),
+            heartbeat_at=timezone.now(),
+        )
+        
+        self.assertEqual(start_export(self.child, self.user).pk, live.pk)
@@ -5,7 +5,9 @@ app_name = 'core'
 
 urlpatterns = [
     path('', views.DashboardView.as_view(), name='dashboard'),
+    path('at-this-age/', views.AtThisAgeView.as_view(), name='at_this_age'),
     path('features/', views.FeaturesView.as_view(), name='features'),
     path('export/', views.ExportDataView.as_view(), name='export'),
+    path('export/<int:pk>/', views.ExportStatusView.as_view(), name='export_status'),
     path('settings/', views.SettingsView.as_view(), name='settings'),
 ]
\ No newline at end of file
@@ -1,13 +1,15 @@
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.shortcuts import render, redirect
+from django.shortcuts import render, redirect, get_object_or_404
+from django.http import JsonResponse
 from django.views.generic import TemplateView
 from django.contrib import messages
 from django.db.models import Count
+from accounts.access import get_accessible_child, get_accessible_child_ids, get_accessible_children
 from accounts.models import Child
-from memories.models import Memory
-from milestones.models import ChildMilestone
-from albums.models import Album
-from ai_features.models import BedtimeStory
+from .ages import AGE_WINDOW_DAYS, MAX_AGE_WINDOW_DAYS, at_age
+from .dashboard import get_dashboard_summary
+from .exports import start_export
+from .models import ExportJob
 
 class DashboardView(LoginRequiredMixin, TemplateView):
     template_name = 'core/dashboard.html'
@@ -16,29 +18,15 @@ class DashboardView(LoginRequiredMixin, TemplateView):
         context = super().get_context_data(**kwargs)
         
         # Get user's children
-        if self.request.user.is_owner:
-            children = Child.objects.filter(owner=self.request.user)
-        else:
-            children = self.request.user.children.all()
+        children = get_accessible_children(self.request.user)
         
         context['children'] = children
         
-        if children.exists():
-            # Get stats for all children
-            total_memories = Memory.objects.filter(child__in=children).count()
-            total_milestones = ChildMilestone.objects.filter(child__in=children).count()
-            total_albums = Album.objects.filter(child__in=children).count()
-            total_stories = BedtimeStory.objects.filter(child__in=children).count()
-            
-            context['stats'] = {
-                'memories': total_memories,
-                'milestones': total_milestones,
-                'albums': total_albums,
-                'stories': total_stories,
-            }
-            
-            # Recent memories
-            context['recent_memories'] = Memory.objects.filter(child__in=children)[:5]
+        if children:
+            # Stats and recent memories come from the cached summary
+            summary = get_dashboard_summary(self.request.user, get_accessible_child_ids(self.request.user))
+            context['stats'] = summary['stats']
+            context['recent_memories'] = summary['recent_memories']
             
             # Feature availability for each child
             context['child_features'] = {}
@@ -71,6 +59,34 @@ class DashboardView(LoginRequiredMixin, TemplateView):
         
         return upcoming[:3]  # Return next 3 features
 
+class AtThisAgeView(LoginRequiredMixin, TemplateView):
+    template_name = 'core/at_this_age.html'
+    
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        children = get_accessible_children(self.request.user)
+        child = get_accessible_child(self.request.user, self.request.GET.get('child'))
+        
+        if child:
+            # Defaults to the child's age today, to see what siblings did back then
+            try:
+                age_in_days = int(self.request.GET.get('age', child.age_in_days))
+                window = int(self.request.GET.get('window', AGE_WINDOW_DAYS))
+            except ValueError:
+                age_in_days, window = child.age_in_days, AGE_WINDOW_DAYS
+            window = max(0, min(window, MAX_AGE_WINDOW_DAYS))
+            
+            # Siblings are the accessible children of the same family
+            siblings = [sibling for sibling in children if sibling.owner_id == child.owner_id]
+            
+            context['child'] = child
+            context['age_in_days'] = age_in_days
+            context['window'] = window
+            context['columns'] = at_age(siblings, age_in_days, window)
+        
+        context['children'] = children
+        return context
+
 class FeaturesView(LoginRequiredMixin, TemplateView):
     template_name = 'core/features.html'
     
@@ -78,10 +94,7 @@ class FeaturesView(LoginRequiredMixin, TemplateView):
         context = super().get_context_data(**kwargs)
         
         # Get user's children
-        if self.request.user.is_owner:
-            children = Child.objects.filter(owner=self.request.user)
-        else:
-            children = self.request.user.children.all()
+        children = get_accessible_children(self.request.user)
         
         context['children'] = children
         
@@ -157,6 +170,9 @@ class ExportDataView(LoginRequiredMixin, TemplateView):
             return redirect('core:dashboard')
         
         context['children'] = Child.objects.filter(owner=self.request.user)
+        context['export_jobs'] = ExportJob.objects.filter(
+            requested_by=self.request.user
+        ).select_related('child')[:10]
         return context
     
     def post(self, request):
@@ -169,22 +185,37 @@ class ExportDataView(LoginRequiredMixin, TemplateView):
             messages.error(request, "Please select a child to export.")
             return redirect('core:export')
         
-        child = Child.objects.get(id=child_id, owner=request.user)
+        child = get_object_or_404(Child, id=child_id, owner=request.user)
         
-        # TODO: Implement actual export functionality
-        # This would create a background task to generate a zip file with all data
-        messages.success(request, f"Export for {child.name} has been started. You'll receive an email when it's ready.")
+        job = start_export(child, request.user, incremental=request.POST.get('mode') == 'incremental')
+        if job.mode == 'incremental':
+            messages.success(request, f"Exporting changes to {child.name}'s memories since {job.since:%B %d, %Y}.")
+            return redirect('core:export')
+        
+        messages.success(request, f"Export for {child.name} has been started. It will be ready to download here when it finishes.")
         return redirect('core:export')
 
+class ExportStatusView(LoginRequiredMixin, TemplateView):
+    def get(self, request, pk):
+        job = get_object_or_404(ExportJob, pk=pk, child__owner=request.user)
+        return JsonResponse({
+            'status': job.status,
+            'mode': job.mode,
+            'since': job.since,
+            'progress': job.progress,
+            'processed_items': job.processed_items,
+            'total_items': job.total_items,
+            'bytes_written': job.bytes_written,
+            'download_url': job.export_file.url if job.status == 'completed' and job.export_file else None,
+            'error': job.error_message,
+        })
+
 class SettingsView(LoginRequiredMixin, TemplateView):
     template_name = 'core/settings.html'
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         
-        if self.request.user.is_owner:
-            context['children'] = Child.objects.filter(owner=self.request.user)
-        else:
-            context['children'] = self.request.user.children.all()
+        context['children'] = get_accessible_children(self.request.user)
         
         return context
\ No newline at end of file
@@ -22,6 +22,7 @@ INSTALLED_APPS = [
     'django.contrib.messages',
     'django.contrib.staticfiles',
     'django.contrib.humanize',
+    'django.contrib.postgres',
     
     # Third party apps
     'crispy_forms',
@@ -86,6 +87,20 @@ DATABASES = {
     }
 }
 
+# Cache (Redis, shared by every web and worker process)
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': config('REDIS_CACHE_URL', default='redis://localhost:6379/1'),
+    },
+    # Rendered memory card fragments, kept apart so they can be flushed on their own
+    'fragments': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': config('REDIS_FRAGMENT_CACHE_URL', default='redis://localhost:6379/2'),
+        'KEY_PREFIX': 'ehron',
+    },
+}
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -142,8 +157,40 @@ if USE_S3:
     
     DEFAULT_FILE_STORAGE = 'storages.backends.s3boto3.S3Boto3Storage'
 
+# Resumable uploads (S3 multipart parts must be at least 5 MB)
+UPLOAD_CHUNK_SIZE = config('UPLOAD_CHUNK_SIZE', default=8 * 1024 * 1024, cast=int)
+UPLOAD_MAX_SIZE = config('UPLOAD_MAX_SIZE', default=4 * 1024 * 1024 * 1024, cast=int)
+# Pending uploads older than this are aborted; incomplete S3 multipart parts are billed until then
+UPLOAD_SESSION_TTL = config('UPLOAD_SESSION_TTL', default=2 * 24 * 60 * 60, cast=int)
+
+# Video transcoding
+VIDEO_MAX_WIDTH = config('VIDEO_MAX_WIDTH', default=1280, cast=int)
+VIDEO_MAX_BITRATE = config('VIDEO_MAX_BITRATE', default='2500k')
+VIDEO_BUFFER_SIZE = config('VIDEO_BUFFER_SIZE', default='5000k')
+VIDEO_HLS_ENABLED = config('VIDEO_HLS_ENABLED', default=False, cast=bool)
+
+# Data exports are assembled in a spool file on the worker's disk, never in memory
+EXPORT_TEMP_DIR = config('EXPORT_TEMP_DIR', default=None)
+EXPORT_CHUNK_SIZE = config('EXPORT_CHUNK_SIZE', default=1024 * 1024, cast=int)
+
 # OpenAI Configuration
 OPENAI_API_KEY = config('OPENAI_API_KEY', default='')
+# Point at any OpenAI-compatible server, e.g. a local fake for testing
+OPENAI_BASE_URL = config('OPENAI_BASE_URL', default=None)
+OPENAI_MAX_RETRIES = config('OPENAI_MAX_RETRIES', default=3, cast=int)
+
+# Batch captioning: requests in flight and the client-side request budget
+AI_CAPTION_CONCURRENCY = config('AI_CAPTION_CONCURRENCY', default=8, cast=int)
+AI_REQUESTS_PER_MINUTE = config('AI_REQUESTS_PER_MINUTE', default=300, cast=int)
+
+# Completions are reused for identical prompts until they expire; beyond
+# AI_RESULT_CACHE_MAX_ENTRIES the least recently used results are evicted
+AI_RESULT_CACHE_TTL = config('AI_RESULT_CACHE_TTL', default=30 * 24 * 60 * 60, cast=int)
+AI_RESULT_CACHE_MAX_ENTRIES = config('AI_RESULT_CACHE_MAX_ENTRIES', default=10000, cast=int)
+
+# Local Whisper transcription, run on its own worker queue
+WHISPER_MODEL = config('WHISPER_MODEL', default='base')
+WHISPER_LANGUAGE = config('WHISPER_LANGUAGE', default='')
 
 # Celery Configuration
 CELERY_BROKER_URL = config('CELERY_BROKER_URL', default='redis://localhost:6379')
@@ -153,6 +200,60 @@ CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = TIME_ZONE
 
+# One queue per workload class, each served by its own workers:
+#   llm            short interactive completions (captions, stories)
+#   bulk           long AI batches, kept from delaying interactive work
+#   media          image renditions and video transcodes
+#   transcription  CPU-heavy, memory-resident Whisper
+#   exports        multi-GB archive builds
+CELERY_TASK_ROUTES = {
+    'ai_features.tasks.generate_photo_caption': {'queue': 'llm'},
+    'ai_features.tasks.generate_bedtime_story': {'queue': 'llm'},
+    'ai_features.tasks.generate_batch_captions': {'queue': 'bulk'},
+    'ai_features.tasks.transcribe_audio_file': {'queue': 'transcription'},
+    'memories.tasks.generate_memory_renditions': {'queue': 'media'},
+    'memories.tasks.transcode_memory_video': {'queue': 'media'},
+    'core.tasks.export_child_data': {'queue': 'exports'},
+}
+
+# Reserve one task at a time so a long job never holds short ones hostage
+CELERY_WORKER_PREFETCH_MULTIPLIER = 1
+
+# Fair scheduling: jobs wait in per-family Redis lists and are released
+# round-robin, at most FAIR_QUEUE_SLOTS[queue] at a time (match the workers'
+# total concurrency for the queue)
+FAIR_QUEUE_SLOTS = {
+    'llm': config('FAIR_SLOTS_LLM', default=16, cast=int),
+    'bulk': config('FAIR_SLOTS_BULK', default=2, cast=int),
+    'media': config('FAIR_SLOTS_MEDIA', default=4, cast=int),
+    'transcription': config('FAIR_SLOTS_TRANSCRIPTION', default=2, cast=int),
+    'exports': config('FAIR_SLOTS_EXPORTS', default=2, cast=int),
+}
+# A slot whose task never reported back (lost worker) is reclaimed once its
+# lease runs out. Exports and transcriptions can run for hours, so they renew
+# their lease as they make progress and keep it short to recover lost workers fast
+FAIR_QUEUE_SLOT_TIMEOUTS = {
+    'llm': config('FAIR_TIMEOUT_LLM', default=10 * 60, cast=int),
+    'bulk': config('FAIR_TIMEOUT_BULK', default=2 * 60 * 60, cast=int),
+    'media': config('FAIR_TIMEOUT_MEDIA', default=2 * 60 * 60, cast=int),
+    'transcription': config('FAIR_TIMEOUT_TRANSCRIPTION', default=30 * 60, cast=int),
+    'exports': config('FAIR_TIMEOUT_EXPORTS', default=30 * 60, cast=int),
+}
+
+CELERY_BEAT_SCHEDULE = {
+    'pump-fair-queues': {
+        'task': 'core.tasks.pump_fair_queues',
+        'schedule': 30.0,
+    },
+    'expire-upload-sessions': {
+        'task': 'memories.tasks.expire_upload_sessions',
+        'schedule': 60 * 60.0,
+    },
+}
+
+# Redis pub/sub channel for task status pushed to browsers
+EVENTS_REDIS_URL = config('EVENTS_REDIS_URL', default='redis://localhost:6379')
+
 # Security Settings
 SECURE_BROWSER_XSS_FILTER = True
 SECURE_CONTENT_TYPE_NOSNIFF = True
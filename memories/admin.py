@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Memory, MemoryReaction, MemoryComment
+from .models import Memory, MemoryReaction, MemoryComment, Tag
 
 class MemoryReactionInline(admin.TabularInline):
     model = MemoryReaction
@@ -25,6 +25,11 @@ class MemoryCommentAdmin(admin.ModelAdmin):
     list_filter = ['created_at']
     search_fields = ['content', 'memory__title']
 
+class TagAdmin(admin.ModelAdmin):
+    list_display = ['name', 'created_at']
+    search_fields = ['name']
+
 admin.site.register(Memory, MemoryAdmin)
 admin.site.register(MemoryReaction, MemoryReactionAdmin)
-admin.site.register(MemoryComment, MemoryCommentAdmin)
\ No newline at end of file
+admin.site.register(MemoryComment, MemoryCommentAdmin)
+admin.site.register(Tag, TagAdmin)
\ No newline at end of file
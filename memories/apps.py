@@ -0,0 +1,8 @@
+from django.apps import AppConfig
+
+class MemoriesConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'memories'
+    
+    def ready(self):
+        from . import signals
\ No newline at end of file
@@ -1,8 +1,13 @@
 from django import forms
-from .models import Memory, MemoryComment
-from accounts.models import Child
+from .models import Memory, MemoryComment, UploadSession
+from accounts.access import accessible_children
+from .uploads import consume_upload
 
 class MemoryForm(forms.ModelForm):
+    # Completed resumable uploads, used instead of posting large files with the form
+    video_upload = forms.UUIDField(required=False, widget=forms.HiddenInput)
+    audio_upload = forms.UUIDField(required=False, widget=forms.HiddenInput)
+    
     class Meta:
         model = Memory
         fields = [
@@ -18,12 +23,43 @@ class MemoryForm(forms.ModelForm):
     def __init__(self, *args, **kwargs):
         user = kwargs.pop('user', None)
         super().__init__(*args, **kwargs)
+        self.user = user
         
         if user:
-            if user.is_owner:
-                self.fields['child'].queryset = Child.objects.filter(owner=user)
-            else:
-                self.fields['child'].queryset = user.children.all()
+            self.fields['child'].queryset = accessible_children(user)
+    
+    def _clean_upload(self, field):
+        upload_id = self.cleaned_data.get(f'{field}_upload')
+        if not upload_id:
+            return None
+        
+        session = UploadSession.objects.filter(pk=upload_id, user=self.user, field=field).first()
+        if session and session.status == 'consumed':
+            raise forms.ValidationError("This upload is already attached to another memory.")
+        if not session or session.status != 'completed':
+            raise forms.ValidationError("The upload has not finished yet. Please wait and try again.")
+        return session
+    
+    def clean_video_upload(self):
+        return self._clean_upload('video')
+    
+    def clean_audio_upload(self):
+        return self._clean_upload('audio')
+    
+    def save(self, commit=True):
+        memory = super().save(commit=False)
+        
+        # The file is already committed to storage; only its name is recorded.
+        # Claiming the session raises UploadError if another memory got it first
+        for field in ('video', 'audio'):
+            session = self.cleaned_data.get(f'{field}_upload')
+            if session:
+                consume_upload(session)
+                setattr(memory, field, session.storage_key)
+        
+        if commit:
+            memory.save()
+        return memory
 
 class MemoryCommentForm(forms.ModelForm):
     class Meta:
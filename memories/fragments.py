@@ -0,0 +1,99 @@
+import hashlib
+import threading
+from django.core.cache import caches
+
+FRAGMENT_CACHE = 'fragments'
+
+# Keys change whenever a card's content does, so the timeout only bounds
+# how long superseded fragments linger in Redis
+FRAGMENT_TIMEOUT = 24 * 60 * 60
+
+# Hit/miss counts are batched in-process and flushed to Redis every N lookups
+STATS_FLUSH_EVERY = 100
+STATS_KEYS = {'hits': 'fragments:stats:hits', 'misses': 'fragments:stats:misses'}
+
+_stats_lock = threading.Lock()
+_pending_stats = {'hits': 0, 'misses': 0}
+
+def fragment_cache():
+    return caches[FRAGMENT_CACHE]
+
+def card_version(memory):
+    """Fingerprint of everything a card renders that can change without a new key"""
+    comments_updated_at = getattr(memory, 'comments_updated_at', None)
+    # Display names of the previewed comments' authors, from the prefetched comments
+    authors = ','.join(
+        f"{comment.user_id}:{comment.user.first_name or comment.user.username}"
+        for comment in getattr(memory, 'recent_comments', [])
+    )
+    parts = [
+        memory.updated_at.isoformat(),
+        memory.child.name,
+        authors,
+        getattr(memory, 'reaction_total', 0),
+        getattr(memory, 'comment_total', 0),
+        comments_updated_at.isoformat() if comments_updated_at else '',
+        # Renditions and transcodes are written with update(), bypassing updated_at
+        memory.thumbnail.name or '',
+        memory.video_web.name or '',
+        memory.video_hls_playlist,
+        memory.video_status,
+    ]
+    return hashlib.md5('|'.join(str(part) for part in parts).encode()).hexdigest()
+
+def card_cache_key(memory, variant):
+    return f"memory-card:{variant}:{memory.pk}:{card_version(memory)}"
+
+def _record(kind):
+    with _stats_lock:
+        _pending_stats[kind] += 1
+        if sum(_pending_stats.values()) < STATS_FLUSH_EVERY:
+            return
+        pending = dict(_pending_stats)
+        for key in _pending_stats:
+            _pending_stats[key] = 0
+    _flush(pending)
+
+def record_hit():
+    _record('hits')
+
+def record_miss():
+    _record('misses')
+
+def _flush(pending):
+    cache = fragment_cache()
+    for kind, count in pending.items():
+        if not count:
+            continue
+        try:
+            cache.incr(STATS_KEYS[kind], count)
+        except ValueError:
+            cache.add(STATS_KEYS[kind], 0, None)
+            cache.incr(STATS_KEYS[kind], count)
+
+def flush_stats():
+    """Push this process's unflushed counts to Redis"""
+    with _stats_lock:
+        pending = dict(_pending_stats)
+        for key in _pending_stats:
+            _pending_stats[key] = 0
+    _flush(pending)
+
+def get_stats():
+    """Cluster-wide hit and miss counts for the memory card fragment cache"""
+    flush_stats()
+    values = fragment_cache().get_many(STATS_KEYS.values())
+    hits = values.get(STATS_KEYS['hits'], 0)
+    misses = values.get(STATS_KEYS['misses'], 0)
+    lookups = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': round(hits / lookups, 4) if lookups else None,
+    }
+
+def reset_stats():
+    with _stats_lock:
+        for key in _pending_stats:
+            _pending_stats[key] = 0
+    fragment_cache().delete_many(STATS_KEYS.values())
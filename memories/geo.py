@@ -0,0 +1,73 @@
+from django.db.models import Avg, CharField, Count, Min, Q
+from django.db.models.functions import Cast, Substr
+
+GEOHASH_ALPHABET = '0123456789bcdefghjkmnpqrstuvwxyz'
+GEOHASH_PRECISION = 9
+
+# Geohash prefix length used to cluster at each map zoom level; chosen so a
+# viewport holds at most a few hundred cells
+ZOOM_PRECISION = [
+    (2, 1),
+    (4, 2),
+    (7, 3),
+    (9, 4),
+    (12, 5),
+    (14, 6),
+    (16, 7),
+]
+MAX_PRECISION = 8
+
+def encode_geohash(latitude, longitude, precision=GEOHASH_PRECISION):
+    """Standard base32 geohash of a point"""
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    latitude, longitude = float(latitude), float(longitude)
+    geohash = []
+    bits = 0
+    bit_count = 0
+    even = True
+    
+    while len(geohash) < precision:
+        value, value_range = (longitude, lon_range) if even else (latitude, lat_range)
+        middle = (value_range[0] + value_range[1]) / 2
+        if value >= middle:
+            bits = (bits << 1) | 1
+            value_range[0] = middle
+        else:
+            bits = bits << 1
+            value_range[1] = middle
+        even = not even
+        bit_count += 1
+        
+        if bit_count == 5:
+            geohash.append(GEOHASH_ALPHABET[bits])
+            bits = 0
+            bit_count = 0
+    
+    return ''.join(geohash)
+
+def precision_for_zoom(zoom):
+    for max_zoom, precision in ZOOM_PRECISION:
+        if zoom <= max_zoom:
+            return precision
+    return MAX_PRECISION
+
+def bbox_filter(west, south, east, north):
+    """Q for points inside a bounding box, including boxes that cross the antimeridian"""
+    latitude = Q(latitude__gte=south, latitude__lte=north)
+    if west <= east:
+        return latitude & Q(longitude__gte=west, longitude__lte=east)
+    return latitude & (Q(longitude__gte=west) | Q(longitude__lte=east))
+
+def cluster_memories(queryset, zoom, limit=500):
+    """Group geotagged memories into geohash cells in one aggregate query"""
+    precision = precision_for_zoom(zoom)
+    return queryset.exclude(geohash='').annotate(
+        cell=Substr('geohash', 1, precision)
+    ).values('cell').annotate(
+        count=Count('id'),
+        center_latitude=Avg('latitude'),
+        center_longitude=Avg('longitude'),
+        # Any member works as the cluster's preview; Postgres has no min(uuid)
+        sample_id=Min(Cast('id', CharField())),
+    ).order_by('-count')[:limit]
\ No newline at end of file
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from memories.fragments import get_stats, reset_stats
+
+class Command(BaseCommand):
+    help = 'Show the hit and miss counters of the memory card fragment cache'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help='Zero the counters after printing them')
+    
+    def handle(self, *args, **options):
+        stats = get_stats()
+        hit_rate = f"{stats['hit_rate']:.1%}" if stats['hit_rate'] is not None else 'n/a'
+        self.stdout.write(f"Hits: {stats['hits']}  Misses: {stats['misses']}  Hit rate: {hit_rate}")
+        
+        if options['reset']:
+            reset_stats()
+            self.stdout.write(self.style.SUCCESS('Fragment cache counters reset'))
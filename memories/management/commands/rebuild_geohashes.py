@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+from memories.geo import encode_geohash
+from memories.models import Memory
+
+class Command(BaseCommand):
+    help = 'Backfill the geohash column used by the Memory Map for geotagged memories'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+    
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        queryset = Memory.objects.filter(
+            latitude__isnull=False, longitude__isnull=False
+        ).order_by('pk').only('pk', 'latitude', 'longitude', 'geohash')
+        total = 0
+        last_pk = None
+        
+        while True:
+            batch = queryset
+            if last_pk is not None:
+                batch = batch.filter(pk__gt=last_pk)
+            memories = list(batch[:batch_size])
+            if not memories:
+                break
+            
+            for memory in memories:
+                memory.geohash = encode_geohash(memory.latitude, memory.longitude)
+            Memory.objects.bulk_update(memories, ['geohash'])
+            
+            total += len(memories)
+            last_pk = memories[-1].pk
+            self.stdout.write(f"Geohashed {total} memories...")
+        
+        self.stdout.write(self.style.SUCCESS(f"Geohashes rebuilt for {total} memories"))
\ No newline at end of file
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+from memories.models import Memory
+from memories.search import update_search_vector
+
+class Command(BaseCommand):
+    help = 'Backfill the full-text search vector for existing memories'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--child', type=int, help='Only rebuild memories of this child')
+        parser.add_argument('--missing', action='store_true', help='Only rows without a search vector')
+    
+    def handle(self, *args, **options):
+        queryset = Memory.objects.order_by('pk')
+        if options['child']:
+            queryset = queryset.filter(child_id=options['child'])
+        if options['missing']:
+            queryset = queryset.filter(search_vector__isnull=True)
+        
+        batch_size = options['batch_size']
+        total = 0
+        last_pk = None
+        
+        # Walk the primary key so each batch is an index range scan
+        while True:
+            batch = queryset
+            if last_pk is not None:
+                batch = batch.filter(pk__gt=last_pk)
+            ids = list(batch.values_list('pk', flat=True)[:batch_size])
+            if not ids:
+                break
+            
+            total += update_search_vector(ids)
+            last_pk = ids[-1]
+            self.stdout.write(f"Indexed {total} memories...")
+        
+        self.stdout.write(self.style.SUCCESS(f"Search index rebuilt for {total} memories"))
\ No newline at end of file
@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from memories.models import Memory, MemoryTag, Tag, parse_tags
+
+class Command(BaseCommand):
+    help = 'Parse the comma-separated Memory.tags strings into the normalized tag index'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+    
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        queryset = Memory.objects.order_by('pk').values_list('pk', 'child_id', 'tags')
+        total = 0
+        last_pk = None
+        
+        while True:
+            batch = queryset
+            if last_pk is not None:
+                batch = batch.filter(pk__gt=last_pk)
+            rows = list(batch[:batch_size])
+            if not rows:
+                break
+            
+            parsed = [(pk, child_id, parse_tags(tags)) for pk, child_id, tags in rows]
+            names = {name for _, _, row_names in parsed for name in row_names}
+            
+            with transaction.atomic():
+                Tag.objects.bulk_create([Tag(name=name) for name in names], ignore_conflicts=True)
+                tag_ids = dict(Tag.objects.filter(name__in=names).values_list('name', 'id'))
+                
+                MemoryTag.objects.filter(memory_id__in=[row[0] for row in rows]).delete()
+                MemoryTag.objects.bulk_create([
+                    MemoryTag(memory_id=pk, child_id=child_id, tag_id=tag_ids[name])
+                    for pk, child_id, row_names in parsed
+                    for name in row_names
+                ])
+            
+            total += len(rows)
+            last_pk = rows[-1][0]
+            self.stdout.write(f"Indexed tags for {total} memories...")
+        
+        self.stdout.write(self.style.SUCCESS(f"Tag index rebuilt for {total} memories"))
\ No newline at end of file
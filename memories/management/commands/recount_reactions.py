@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+from memories.models import Memory
+from memories.reactions import recount_reactions
+
+class Command(BaseCommand):
+    help = 'Recompute the denormalized reaction counters from MemoryReaction'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+    
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        queryset = Memory.objects.order_by('pk')
+        total = 0
+        last_pk = None
+        
+        while True:
+            batch = queryset
+            if last_pk is not None:
+                batch = batch.filter(pk__gt=last_pk)
+            ids = list(batch.values_list('pk', flat=True)[:batch_size])
+            if not ids:
+                break
+            
+            recount_reactions(ids)
+            total += len(ids)
+            last_pk = ids[-1]
+            self.stdout.write(f"Recounted reactions for {total} memories...")
+        
+        self.stdout.write(self.style.SUCCESS(f"Reaction counters repaired for {total} memories"))
\ No newline at end of file
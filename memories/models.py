@@ -1,11 +1,35 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth import get_user_model
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
+from django.core.files.storage import default_storage
 from accounts.models import Child
-from PIL import Image
+from .geo import encode_geohash
 import uuid
 
 User = get_user_model()
 
+def parse_tags(value):
+    """Split a comma-separated tag string into unique, normalized tag names"""
+    names = []
+    for tag in (value or '').split(','):
+        tag = tag.strip().lower()[:Tag.NAME_MAX_LENGTH]
+        if tag and tag not in names:
+            names.append(tag)
+    return names
+
+class Tag(models.Model):
+    NAME_MAX_LENGTH = 100
+    
+    name = models.CharField(max_length=NAME_MAX_LENGTH, unique=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['name']
+    
+    def __str__(self):
+        return self.name
+
 class Memory(models.Model):
     MEMORY_TYPES = [
         ('photo', 'Photo'),
@@ -28,20 +52,37 @@ class Memory(models.Model):
     video = models.FileField(upload_to='memories/videos/', blank=True, null=True)
     audio = models.FileField(upload_to='memories/audio/', blank=True, null=True)
     
-    # Thumbnails (auto-generated)
+    # Thumbnails (auto-generated, the JPEG card rendition or the video poster frame)
     thumbnail = models.ImageField(upload_to='memories/thumbnails/', blank=True, null=True)
     
+    # Web playback renditions of the video (auto-generated)
+    VIDEO_STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('processing', 'Processing'),
+        ('ready', 'Ready'),
+        ('failed', 'Failed'),
+    ]
+    video_web = models.FileField(upload_to='memories/videos/web/', blank=True, null=True)
+    video_hls_playlist = models.CharField(max_length=500, blank=True, help_text="Storage name of the HLS playlist")
+    video_status = models.CharField(max_length=20, choices=VIDEO_STATUS_CHOICES, blank=True)
+    
     # Metadata
     memory_date = models.DateTimeField(help_text="When this memory happened")
+    age_in_days = models.IntegerField(null=True, blank=True, editable=False, help_text="Child's age on memory_date")
     tags = models.CharField(max_length=500, blank=True, help_text="Comma-separated tags")
+    tag_set = models.ManyToManyField(Tag, through='MemoryTag', related_name='memories', blank=True)
     location = models.CharField(max_length=200, blank=True)
     latitude = models.DecimalField(max_digits=9, decimal_places=6, blank=True, null=True)
     longitude = models.DecimalField(max_digits=9, decimal_places=6, blank=True, null=True)
+    geohash = models.CharField(max_length=12, blank=True, editable=False, help_text="Derived from latitude/longitude")
     
     # AI Features
     ai_caption = models.TextField(blank=True, help_text="AI-generated caption")
     transcription = models.TextField(blank=True, help_text="Audio transcription")
     
+    # Full-text search document, maintained by memories.search
+    search_vector = SearchVectorField(null=True, editable=False)
+    
     # System fields
     is_milestone = models.BooleanField(default=False)
     is_private = models.BooleanField(default=False)
@@ -50,40 +91,166 @@ class Memory(models.Model):
     
     class Meta:
         ordering = ['-memory_date', '-created_at']
+        indexes = [
+            GinIndex(fields=['search_vector'], name='memory_search_vector_idx'),
+            models.Index(fields=['child', '-memory_date', '-created_at', '-id'], name='memory_child_timeline_idx'),
+            models.Index(fields=['child', 'latitude', 'longitude'], name='memory_child_bbox_idx'),
+            models.Index(fields=['child', 'geohash'], name='memory_child_geohash_idx'),
+            models.Index(fields=['child', 'age_in_days'], name='memory_child_age_idx'),
+        ]
     
     def __str__(self):
         return f"{self.title} - {self.child.name}"
     
     def get_tags_list(self):
         """Return tags as a list"""
-        if self.tags:
-            return [tag.strip() for tag in self.tags.split(',')]
-        return []
+        if 'tag_set' in getattr(self, '_prefetched_objects_cache', {}):
+            return [tag.name for tag in self.tag_set.all()]
+        return parse_tags(self.tags)
+    
+    def sync_tags(self):
+        """Mirror the comma-separated tags string into the tag index"""
+        names = parse_tags(self.tags)
+        current_ids = set(self.tag_links.values_list('tag_id', flat=True))
+        if not names and not current_ids:
+            return
+        
+        Tag.objects.bulk_create([Tag(name=name) for name in names], ignore_conflicts=True)
+        tag_ids = set(Tag.objects.filter(name__in=names).values_list('id', flat=True))
+        
+        self.tag_links.exclude(tag_id__in=tag_ids).delete()
+        MemoryTag.objects.bulk_create([
+            MemoryTag(memory=self, tag_id=tag_id, child_id=self.child_id)
+            for tag_id in tag_ids - current_ids
+        ], ignore_conflicts=True)
+        
+        # The child is denormalized onto the links for facet counts
+        self.tag_links.exclude(child_id=self.child_id).update(child_id=self.child_id)
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored media so a replaced upload can be detected on save
+        instance._loaded_image_name = instance.__dict__.get('image')
+        instance._loaded_video_name = instance.__dict__.get('video')
+        return instance
     
     def save(self, *args, **kwargs):
-        # Generate thumbnail for images
-        if self.image and not self.thumbnail:
-            self.create_thumbnail()
+        if self.latitude is not None and self.longitude is not None:
+            self.geohash = encode_geohash(self.latitude, self.longitude)
+        else:
+            self.geohash = ''
+        self.age_in_days = self.child.days_old_at(self.memory_date)
+        
+        image_changed = bool(self.image) and self.image.name != getattr(self, '_loaded_image_name', None)
+        video_changed = bool(self.video) and self.video.name != getattr(self, '_loaded_video_name', None)
+        if image_changed or (video_changed and not self.image):
+            # Renditions of the previous media are stale; a video's poster frame
+            # only stands in for the thumbnail when there is no image
+            self.thumbnail = None
+        if video_changed:
+            self.video_web = None
+            self.video_hls_playlist = ''
+            self.video_status = 'pending'
+        
         super().save(*args, **kwargs)
-    
-    def create_thumbnail(self):
-        """Create thumbnail for image"""
-        if not self.image:
-            return
         
-        try:
-            image = Image.open(self.image)
-            image.thumbnail((300, 300), Image.Resampling.LANCZOS)
-            
-            # Save thumbnail
-            thumb_filename = f"thumb_{self.image.name.split('/')[-1]}"
-            thumb_path = f"memories/thumbnails/{thumb_filename}"
-            
-            # TODO: Save thumbnail to storage
-            # This would need proper file handling for production
-            
-        except Exception as e:
-            print(f"Error creating thumbnail: {e}")
+        if image_changed:
+            self._loaded_image_name = self.image.name
+            self.queue_renditions()
+        if video_changed:
+            self._loaded_video_name = self.video.name
+            self.queue_transcode()
+    
+    def queue_renditions(self):
+        """Generate image renditions in the background once this row is committed"""
+        from core.fair_queue import enqueue
+        from .tasks import generate_memory_renditions
+        memory_id, family = str(self.pk), self.child.owner_id
+        transaction.on_commit(lambda: enqueue(generate_memory_renditions, [memory_id], family))
+    
+    def queue_transcode(self):
+        """Transcode the video and extract its poster frame once this row is committed"""
+        from core.fair_queue import enqueue
+        from .tasks import transcode_memory_video
+        memory_id, family = str(self.pk), self.child.owner_id
+        transaction.on_commit(lambda: enqueue(transcode_memory_video, [memory_id], family))
+    
+    @property
+    def video_hls_url(self):
+        if self.video_hls_playlist:
+            return default_storage.url(self.video_hls_playlist)
+        return ''
+    
+    def _get_renditions(self, image_format):
+        renditions = [r for r in self.renditions.all() if r.image_format == image_format]
+        return sorted(renditions, key=lambda r: r.width)
+    
+    def _build_srcset(self, image_format):
+        srcset = []
+        widths = set()
+        for rendition in self._get_renditions(image_format):
+            if rendition.width not in widths:
+                widths.add(rendition.width)
+                srcset.append(f"{rendition.file.url} {rendition.width}w")
+        return ', '.join(srcset)
+    
+    @property
+    def webp_srcset(self):
+        return self._build_srcset('webp')
+    
+    @property
+    def jpeg_srcset(self):
+        return self._build_srcset('jpeg')
+    
+    @property
+    def card_image_url(self):
+        """Smallest image that looks sharp on a memory card, falling back to the original"""
+        if self.thumbnail:
+            return self.thumbnail.url
+        if self.image:
+            return self.image.url
+        return ''
+
+class MemoryRendition(models.Model):
+    SIZES = [
+        ('card', 'Card'),
+        ('detail', 'Detail'),
+        ('lightbox', 'Lightbox'),
+    ]
+    
+    FORMATS = [
+        ('webp', 'WebP'),
+        ('jpeg', 'JPEG'),
+    ]
+    
+    memory = models.ForeignKey(Memory, on_delete=models.CASCADE, related_name='renditions')
+    size = models.CharField(max_length=10, choices=SIZES)
+    image_format = models.CharField(max_length=10, choices=FORMATS)
+    file = models.ImageField(upload_to='memories/renditions/')
+    width = models.PositiveIntegerField(default=0)
+    height = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        unique_together = ['memory', 'size', 'image_format']
+    
+    def __str__(self):
+        return f"{self.memory_id} {self.size} {self.image_format}"
+
+class MemoryTag(models.Model):
+    memory = models.ForeignKey(Memory, on_delete=models.CASCADE, related_name='tag_links')
+    tag = models.ForeignKey(Tag, on_delete=models.CASCADE, related_name='memory_links')
+    child = models.ForeignKey(Child, on_delete=models.CASCADE, related_name='+')
+    
+    class Meta:
+        unique_together = ['memory', 'tag']
+        indexes = [
+            models.Index(fields=['child', 'tag'], name='memorytag_child_tag_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.memory.title} #{self.tag.name}"
 
 class MemoryReaction(models.Model):
     REACTIONS = [
@@ -108,6 +275,41 @@ class MemoryReaction(models.Model):
     def __str__(self):
         return f"{self.user.username} reacted {self.reaction} to {self.memory.title}"
 
+class MemoryReactionSummary(models.Model):
+    """Denormalized reaction counters, moved with F() updates on every toggle"""
+    COUNT_FIELDS = {
+        '❤️': 'love_count',
+        '😍': 'adore_count',
+        '😊': 'happy_count',
+        '🤗': 'hugs_count',
+        '👏': 'clap_count',
+        '🎉': 'celebrate_count',
+        '😢': 'emotional_count',
+        '🥰': 'cute_count',
+    }
+    
+    memory = models.OneToOneField(Memory, on_delete=models.CASCADE, primary_key=True, related_name='reaction_summary')
+    love_count = models.IntegerField(default=0)
+    adore_count = models.IntegerField(default=0)
+    happy_count = models.IntegerField(default=0)
+    hugs_count = models.IntegerField(default=0)
+    clap_count = models.IntegerField(default=0)
+    celebrate_count = models.IntegerField(default=0)
+    emotional_count = models.IntegerField(default=0)
+    cute_count = models.IntegerField(default=0)
+    total = models.IntegerField(default=0)
+    
+    def __str__(self):
+        return f"{self.total} reactions on {self.memory_id}"
+    
+    def get_counts(self):
+        """Return {emoji: count} for every reaction with a non-zero count"""
+        counts = {}
+        for reaction, field in self.COUNT_FIELDS.items():
+            if getattr(self, field):
+                counts[reaction] = getattr(self, field)
+        return counts
+
 class MemoryComment(models.Model):
     memory = models.ForeignKey(Memory, on_delete=models.CASCADE, related_name='comments')
     user = models.ForeignKey(User, on_delete=models.CASCADE)
@@ -119,4 +321,48 @@ class MemoryComment(models.Model):
         ordering = ['created_at']
     
     def __str__(self):
-        return f"Comment by {self.user.username} on {self.memory.title}"
\ No newline at end of file
+        return f"Comment by {self.user.username} on {self.memory.title}"
+
+class UploadSession(models.Model):
+    """A resumable upload of a large video or audio file, committed before its memory is saved"""
+    FIELD_CHOICES = [
+        ('video', 'Video'),
+        ('audio', 'Audio'),
+    ]
+    
+    BACKEND_CHOICES = [
+        ('local', 'Local chunk append'),
+        ('s3', 'S3 multipart'),
+    ]
+    
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('completed', 'Completed'),
+        ('consumed', 'Attached to a memory'),
+        ('aborted', 'Aborted'),
+    ]
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='upload_sessions')
+    field = models.CharField(max_length=10, choices=FIELD_CHOICES)
+    filename = models.CharField(max_length=255)
+    content_type = models.CharField(max_length=100, blank=True)
+    size = models.BigIntegerField()
+    chunk_size = models.PositiveIntegerField()
+    backend = models.CharField(max_length=10, choices=BACKEND_CHOICES)
+    storage_key = models.CharField(max_length=500, help_text="Final name in the configured storage")
+    s3_upload_id = models.CharField(max_length=255, blank=True)
+    bytes_received = models.BigIntegerField(default=0)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    created_at = models.DateTimeField(auto_now_add=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return f"{self.filename} ({self.status})"
+    
+    @property
+    def part_count(self):
+        return max(1, -(-self.size // self.chunk_size))
\ No newline at end of file
@@ -0,0 +1,46 @@
+import base64
+import uuid
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+# Every keyset page is ordered on this unique, indexed key
+KEYSET_ORDERING = ('-memory_date', '-created_at', '-pk')
+
+def encode_cursor(memory):
+    """Opaque cursor pointing just after the given memory"""
+    raw = f"{memory.memory_date.isoformat()}|{memory.created_at.isoformat()}|{memory.pk}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def decode_cursor(cursor):
+    """Return (memory_date, created_at, pk) for a cursor, or None if it is malformed"""
+    try:
+        memory_date, created_at, pk = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+        position = (parse_datetime(memory_date), parse_datetime(created_at), uuid.UUID(pk))
+    except ValueError:
+        return None
+    
+    if None in position:
+        return None
+    return position
+
+def keyset_page(queryset, cursor=None, page_size=20):
+    """Return (memories, next_cursor) for the page after the cursor, newest first"""
+    queryset = queryset.order_by(*KEYSET_ORDERING)
+    
+    position = decode_cursor(cursor) if cursor else None
+    if position:
+        memory_date, created_at, pk = position
+        # The leading range bound lets Postgres start the index scan at the cursor
+        queryset = queryset.filter(memory_date__lte=memory_date).filter(
+            Q(memory_date__lt=memory_date) |
+            Q(memory_date=memory_date, created_at__lt=created_at) |
+            Q(memory_date=memory_date, created_at=created_at, pk__lt=pk)
+        )
+    
+    memories = list(queryset[:page_size + 1])
+    next_cursor = None
+    if len(memories) > page_size:
+        memories = memories[:page_size]
+        next_cursor = encode_cursor(memories[-1])
+    
+    return memories, next_cursor
\ No newline at end of file
@@ -0,0 +1,41 @@
+from django.db.models import Count, F, Max, OuterRef, Prefetch, Subquery, Window
+from django.db.models.functions import Coalesce, RowNumber
+from .models import Memory, MemoryComment
+
+# Comments shown under each memory card
+CARD_COMMENT_LIMIT = 3
+
+def _count_subquery(model):
+    """Correlated COUNT per memory, avoiding join fan-out between relations"""
+    counts = model.objects.filter(memory=OuterRef('pk')).order_by().values('memory')
+    return Coalesce(Subquery(counts.annotate(total=Count('*')).values('total')), 0)
+
+def _latest_comment_update():
+    """Newest comment edit per memory, part of the card fragment cache version"""
+    comments = MemoryComment.objects.filter(memory=OuterRef('pk')).order_by().values('memory')
+    return Subquery(comments.annotate(latest=Max('updated_at')).values('latest'))
+
+def recent_comments_queryset(limit=CARD_COMMENT_LIMIT):
+    """First comments of every memory, numbered per memory so the database does the slicing"""
+    return MemoryComment.objects.annotate(
+        position=Window(
+            expression=RowNumber(),
+            partition_by=[F('memory_id')],
+            order_by=[F('created_at').asc(), F('id').asc()],
+        )
+    ).filter(position__lte=limit).select_related('user').order_by('memory_id', 'position')
+
+def with_card_data(queryset=None):
+    """Load everything a memory card renders in a constant number of queries"""
+    if queryset is None:
+        queryset = Memory.objects.all()
+    
+    return queryset.select_related('child', 'created_by').annotate(
+        reaction_total=Coalesce('reaction_summary__total', 0),
+        comment_total=_count_subquery(MemoryComment),
+        comments_updated_at=_latest_comment_update(),
+    ).prefetch_related(
+        Prefetch('comments', queryset=recent_comments_queryset(), to_attr='recent_comments'),
+        'tag_set',
+        'renditions',
+    )
\ No newline at end of file
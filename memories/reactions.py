@@ -0,0 +1,81 @@
+import threading
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+from .models import Memory, MemoryReaction, MemoryReactionSummary
+
+# Memories whose reactions were deleted outside toggle_reaction, recounted on commit
+_pending = threading.local()
+
+def recount_reactions(memory_ids):
+    """Rebuild the reaction summaries of the given memories from MemoryReaction rows"""
+    summaries = {pk: MemoryReactionSummary(memory_id=pk) for pk in memory_ids}
+    rows = MemoryReaction.objects.filter(memory_id__in=summaries.keys()).values(
+        'memory_id', 'reaction'
+    ).annotate(count=Count('id')).order_by()
+    
+    for row in rows:
+        summary = summaries[row['memory_id']]
+        field = MemoryReactionSummary.COUNT_FIELDS.get(row['reaction'])
+        if field:
+            setattr(summary, field, row['count'])
+        summary.total += row['count']
+    
+    MemoryReactionSummary.objects.bulk_create(
+        summaries.values(),
+        update_conflicts=True,
+        unique_fields=['memory'],
+        update_fields=[*MemoryReactionSummary.COUNT_FIELDS.values(), 'total'],
+    )
+    return list(summaries.values())
+
+def recount_reactions_on_commit(memory_id):
+    """Recount a memory's reactions once the current transaction commits, batched per transaction"""
+    if not hasattr(_pending, 'memory_ids'):
+        _pending.memory_ids = set()
+    _pending.memory_ids.add(memory_id)
+    transaction.on_commit(_flush_pending_recounts)
+
+def _flush_pending_recounts():
+    memory_ids = getattr(_pending, 'memory_ids', None)
+    if not memory_ids:
+        return
+    _pending.memory_ids = set()
+    
+    with transaction.atomic():
+        # Lock the summaries first so a concurrent toggle's F() delta lands after the recount, not under it
+        list(MemoryReactionSummary.objects.select_for_update().filter(memory_id__in=memory_ids).values_list('pk'))
+        # A cascade from a deleted memory must not upsert a summary for it again
+        surviving = list(Memory.objects.filter(pk__in=memory_ids).values_list('pk', flat=True))
+        if surviving:
+            recount_reactions(surviving)
+
+def toggle_reaction(memory, user, reaction):
+    """Add or remove a user's reaction; returns (action, reaction_counts)"""
+    field = MemoryReactionSummary.COUNT_FIELDS[reaction]
+    
+    with transaction.atomic():
+        # A single DELETE: this path moves the counters itself, so skip the post_delete recount
+        # (and the SELECT Django issues to send it) that cascades and admin deletes rely on
+        reactions = MemoryReaction.objects.filter(memory=memory, user=user, reaction=reaction)
+        deleted = reactions._raw_delete(reactions.db)
+        if deleted:
+            action, delta = 'removed', -1
+        else:
+            try:
+                with transaction.atomic():
+                    MemoryReaction.objects.create(memory=memory, user=user, reaction=reaction)
+                action, delta = 'added', 1
+            except IntegrityError:
+                # A concurrent request (double click) already added it
+                action, delta = 'added', 0
+        
+        if delta:
+            updated = MemoryReactionSummary.objects.filter(memory=memory).update(**{
+                field: F(field) + delta,
+                'total': F('total') + delta,
+            })
+            if not updated:
+                recount_reactions([memory.pk])
+    
+    summary = MemoryReactionSummary.objects.filter(memory=memory).first()
+    return action, summary.get_counts() if summary else {}
\ No newline at end of file
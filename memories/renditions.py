@@ -0,0 +1,66 @@
+from io import BytesIO
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+from core.dashboard import touch_child
+from .models import Memory, MemoryRendition
+
+# Longest edge in pixels for each rendition, largest first so each one
+# is resampled from the previous rendition rather than the original
+RENDITION_SIZES = [
+    ('lightbox', 2048),
+    ('detail', 1280),
+    ('card', 480),
+]
+
+RENDITION_FORMATS = {
+    'webp': ('WEBP', 'webp', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', 'jpg', {'quality': 85, 'optimize': True, 'progressive': True}),
+}
+
+def _encode(image, image_format):
+    pil_format, _, options = RENDITION_FORMATS[image_format]
+    buffer = BytesIO()
+    image.save(buffer, pil_format, **options)
+    return buffer.getvalue()
+
+def _open_source(memory):
+    largest = RENDITION_SIZES[0][1]
+    with memory.image.open('rb') as source:
+        image = Image.open(source)
+        # Let the JPEG decoder downscale while decoding instead of inflating every pixel
+        image.draft('RGB', (largest, largest))
+        image = ImageOps.exif_transpose(image)
+        return image.convert('RGB')
+
+def generate_renditions(memory):
+    """Write every size/format rendition of the memory's image through the configured storage"""
+    image = _open_source(memory)
+    base_name = memory.image.name.rsplit('/', 1)[-1].rsplit('.', 1)[0]
+    renditions = []
+    
+    for size, longest_edge in RENDITION_SIZES:
+        image.thumbnail((longest_edge, longest_edge), Image.Resampling.LANCZOS, reducing_gap=3.0)
+        
+        for image_format, (_, extension, _) in RENDITION_FORMATS.items():
+            rendition, _ = MemoryRendition.objects.get_or_create(
+                memory=memory, size=size, image_format=image_format
+            )
+            if rendition.file:
+                rendition.file.delete(save=False)
+            
+            rendition.file.save(
+                f"{memory.pk}/{base_name}_{size}.{extension}",
+                ContentFile(_encode(image, image_format)),
+                save=False,
+            )
+            rendition.width, rendition.height = image.size
+            rendition.save()
+            renditions.append(rendition)
+    
+    # Point the thumbnail at the JPEG card rendition without re-running Memory.save
+    card = next(r for r in renditions if r.size == 'card' and r.image_format == 'jpeg')
+    Memory.objects.filter(pk=memory.pk).update(thumbnail=card.file.name)
+    # update() skips post_save, so retire the cached dashboard cards here
+    touch_child(memory.child_id)
+    
+    return renditions
\ No newline at end of file
@@ -0,0 +1,40 @@
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.search import SearchHeadline, SearchQuery, SearchRank, SearchVector
+from django.db.models import OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from .models import Memory, MemoryComment
+
+SEARCH_CONFIG = 'english'
+
+def comment_text_subquery():
+    """Concatenated comment text for the outer memory row"""
+    comments = MemoryComment.objects.filter(memory=OuterRef('pk')).order_by().values('memory')
+    return Subquery(comments.annotate(text=StringAgg('content', delimiter=' ')).values('text')[:1])
+
+def memory_search_vector():
+    """Weighted tsvector expression covering everything a family can search for"""
+    return (
+        SearchVector('title', weight='A', config=SEARCH_CONFIG) +
+        SearchVector('tags', 'content', weight='B', config=SEARCH_CONFIG) +
+        SearchVector('ai_caption', 'transcription', weight='C', config=SEARCH_CONFIG) +
+        SearchVector(Coalesce(comment_text_subquery(), Value('')), weight='D', config=SEARCH_CONFIG)
+    )
+
+def update_search_vector(memory_ids):
+    """Recompute the stored search vector for the given memories in one UPDATE"""
+    return Memory.objects.filter(pk__in=memory_ids).update(search_vector=memory_search_vector())
+
+def search_memories(queryset, query):
+    """Filter a memory queryset by a user search string, best matches first"""
+    search_query = SearchQuery(query, search_type='websearch', config=SEARCH_CONFIG)
+    return queryset.filter(search_vector=search_query).annotate(
+        search_rank=SearchRank('search_vector', search_query),
+        search_headline=SearchHeadline(
+            Coalesce('content', Value('')),
+            search_query,
+            config=SEARCH_CONFIG,
+            start_sel='<mark>',
+            stop_sel='</mark>',
+            max_fragments=2,
+        ),
+    ).order_by('-search_rank', '-memory_date', '-created_at')
\ No newline at end of file
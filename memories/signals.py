@@ -0,0 +1,27 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from .models import Memory, MemoryComment, MemoryReaction
+from .reactions import recount_reactions_on_commit
+from .search import update_search_vector
+
+@receiver(post_save, sender=Memory)
+def refresh_memory_search_vector(sender, instance, **kwargs):
+    """Keep the search vector in step with the memory's own text"""
+    update_search_vector([instance.pk])
+
+@receiver(post_save, sender=Memory)
+def sync_memory_tags(sender, instance, raw=False, **kwargs):
+    """Keep the normalized tag index in step with Memory.tags"""
+    if not raw:
+        instance.sync_tags()
+
+@receiver(post_save, sender=MemoryComment)
+@receiver(post_delete, sender=MemoryComment)
+def refresh_comment_search_vector(sender, instance, **kwargs):
+    """Comment text is part of the memory's search document"""
+    update_search_vector([instance.memory_id])
+
+@receiver(post_delete, sender=MemoryReaction)
+def recount_deleted_reaction(sender, instance, **kwargs):
+    """Cascades and admin deletes bypass the F() counters toggle_reaction maintains"""
+    recount_reactions_on_commit(instance.memory_id)
\ No newline at end of file
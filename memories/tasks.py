@@ -0,0 +1,48 @@
+from celery import shared_task
+from core.dashboard import touch_child
+from .models import Memory
+from .renditions import generate_renditions
+from .transcoding import transcode_video
+from .uploads import expire_abandoned_uploads
+import logging
+
+logger = logging.getLogger(__name__)
+
+@shared_task
+def generate_memory_renditions(memory_id):
+    """Generate card, detail and lightbox renditions for a memory's image"""
+    try:
+        memory = Memory.objects.get(id=memory_id)
+    except Memory.DoesNotExist:
+        return
+    
+    if not memory.image:
+        return
+    
+    try:
+        generate_renditions(memory)
+    except Exception as e:
+        logger.error(f"Error generating renditions for memory {memory_id}: {e}")
+
+@shared_task
+def transcode_memory_video(memory_id):
+    """Extract a poster frame and build web playback renditions for a memory's video"""
+    try:
+        memory = Memory.objects.get(id=memory_id)
+    except Memory.DoesNotExist:
+        return
+    
+    if not memory.video:
+        return
+    
+    try:
+        transcode_video(memory)
+    except Exception as e:
+        logger.error(f"Error transcoding video for memory {memory_id}: {e}")
+        Memory.objects.filter(pk=memory.pk, video=memory.video.name).update(video_status='failed')
+        touch_child(memory.child_id)
+
+@shared_task
+def expire_upload_sessions():
+    """Abort resumable uploads their client abandoned, so partial files and S3 parts are released"""
+    return expire_abandoned_uploads()
\ No newline at end of file
@@ -0,0 +1,39 @@
+from django import template
+from memories.fragments import FRAGMENT_TIMEOUT, card_cache_key, fragment_cache, record_hit, record_miss
+
+register = template.Library()
+
+class MemoryCardNode(template.Node):
+    def __init__(self, nodelist, memory, variant):
+        self.nodelist = nodelist
+        self.memory = memory
+        self.variant = variant
+    
+    def render(self, context):
+        memory = self.memory.resolve(context)
+        key = card_cache_key(memory, self.variant.resolve(context))
+        cache = fragment_cache()
+        
+        html = cache.get(key)
+        if html is not None:
+            record_hit()
+            return html
+        
+        record_miss()
+        html = self.nodelist.render(context)
+        cache.set(key, html, FRAGMENT_TIMEOUT)
+        return html
+
+@register.tag
+def memory_card(parser, token):
+    """
+    Cache the user-independent part of a memory card:
+    {% memory_card memory "timeline" %}...{% endmemory_card %}
+    """
+    bits = token.split_contents()
+    if len(bits) != 3:
+        raise template.TemplateSyntaxError(f"'{bits[0]}' takes a memory and a card variant")
+    
+    nodelist = parser.parse(('endmemory_card',))
+    parser.delete_first_token()
+    return MemoryCardNode(nodelist, parser.compile_filter(bits[1]), parser.compile_filter(bits[2]))
@@ -0,0 +1,36 @@
+from datetime import date
+from django.test import TestCase
+from django.utils import timezone
+from accounts.models import Child, User
+from .models import Memory, MemoryReaction, MemoryReactionSummary
+from .reactions import toggle_reaction
+
+class ToggleReactionTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='parent', password='secret')
+        child = Child.objects.create(name='Ada', birth_date=date(2022, 1, 1), owner=self.user)
+        self.memory = Memory.objects.create(
+            child=child, created_by=self.user, title='First steps', memory_date=timezone.now()
+        )
+    
+    def test_remove_is_one_write_and_one_read(self):
+        toggle_reaction(self.memory, self.user, '❤️')
+        
+        # SAVEPOINT, DELETE, counter UPDATE, RELEASE SAVEPOINT, summary SELECT; no recount
+        with self.assertNumQueries(5):
+            action, counts = toggle_reaction(self.memory, self.user, '❤️')
+        
+        self.assertEqual(action, 'removed')
+        self.assertEqual(counts, {})
+        self.assertFalse(MemoryReaction.objects.filter(memory=self.memory).exists())
+    
+    def test_cascade_delete_recounts_summary(self):
+        other = User.objects.create_user(username='grandparent', password='secret')
+        toggle_reaction(self.memory, self.user, '❤️')
+        toggle_reaction(self.memory, other, '❤️')
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            other.delete()
+        
+        summary = MemoryReactionSummary.objects.get(memory=self.memory)
+        self.assertEqual(summary.get_counts(), {'❤️': 1})
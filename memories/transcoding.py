@@ -0,0 +1,146 @@
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+import ffmpeg
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from core.dashboard import touch_child
+from .models import Memory
+
+# Bytes copied per read when a remote original has to be fetched for ffmpeg
+COPY_BLOCK_SIZE = 1024 * 1024
+
+@contextmanager
+def local_copy(field_file):
+    """Yield a local path for a stored file, streaming it to a temp file when storage is remote"""
+    try:
+        path = field_file.storage.path(field_file.name)
+    except NotImplementedError:
+        path = None
+    
+    if path:
+        yield path
+        return
+    
+    suffix = os.path.splitext(field_file.name)[1]
+    with tempfile.NamedTemporaryFile(suffix=suffix) as temp:
+        with field_file.storage.open(field_file.name, 'rb') as source:
+            shutil.copyfileobj(source, temp, COPY_BLOCK_SIZE)
+        temp.flush()
+        yield temp.name
+
+def probe_duration(source_path):
+    try:
+        return float(ffmpeg.probe(source_path)['format']['duration'])
+    except (ffmpeg.Error, KeyError, ValueError):
+        return 0.0
+
+def extract_poster(source_path, poster_path, duration):
+    """Grab one frame a little way in, past the usual black first frame"""
+    seek = min(1.0, duration / 2) if duration else 0
+    (
+        ffmpeg
+        .input(source_path, ss=seek)
+        .output(poster_path, vframes=1, vf=f"scale='min({settings.VIDEO_MAX_WIDTH},iw)':-2", **{'q:v': 3})
+        .overwrite_output()
+        .run(quiet=True)
+    )
+
+def transcode_web(source_path, output_path):
+    """H.264/AAC MP4 at a capped size and bitrate, with the index up front for progressive playback"""
+    (
+        ffmpeg
+        .input(source_path)
+        .output(
+            output_path,
+            vcodec='libx264',
+            preset='veryfast',
+            crf=23,
+            maxrate=settings.VIDEO_MAX_BITRATE,
+            bufsize=settings.VIDEO_BUFFER_SIZE,
+            pix_fmt='yuv420p',
+            vf=f"scale='min({settings.VIDEO_MAX_WIDTH},iw)':-2",
+            acodec='aac',
+            audio_bitrate='128k',
+            movflags='+faststart',
+        )
+        .overwrite_output()
+        .run(quiet=True)
+    )
+
+def segment_hls(web_path, output_dir):
+    """Cut the web rendition into HLS segments without re-encoding"""
+    playlist_path = os.path.join(output_dir, 'index.m3u8')
+    (
+        ffmpeg
+        .input(web_path)
+        .output(
+            playlist_path,
+            c='copy',
+            format='hls',
+            hls_time=6,
+            hls_playlist_type='vod',
+            hls_segment_filename=os.path.join(output_dir, 'segment_%04d.ts'),
+        )
+        .overwrite_output()
+        .run(quiet=True)
+    )
+    return playlist_path
+
+def _store(path, name):
+    # Overwrite earlier output so names stay stable (HLS playlists depend on them)
+    if default_storage.exists(name):
+        default_storage.delete(name)
+    with open(path, 'rb') as local_file:
+        return default_storage.save(name, File(local_file))
+
+def transcode_video(memory):
+    """Produce the poster, the web MP4 and (optionally) HLS segments for a memory's video"""
+    # Every write is conditional on the video: a replacement uploaded while this runs
+    # has its own transcode queued, and this one's output must not land on it
+    current = Memory.objects.filter(pk=memory.pk, video=memory.video.name)
+    current.update(video_status='processing')
+    touch_child(memory.child_id)
+    base_name = os.path.splitext(os.path.basename(memory.video.name))[0]
+    outputs = {}
+    
+    with local_copy(memory.video) as source_path, tempfile.TemporaryDirectory() as work_dir:
+        duration = probe_duration(source_path)
+        
+        poster_path = None
+        if not memory.image:
+            poster_path = os.path.join(work_dir, 'poster.jpg')
+            extract_poster(source_path, poster_path, duration)
+        
+        web_path = os.path.join(work_dir, 'web.mp4')
+        transcode_web(source_path, web_path)
+        
+        hls_files = []
+        if settings.VIDEO_HLS_ENABLED:
+            hls_dir = os.path.join(work_dir, 'hls')
+            os.makedirs(hls_dir)
+            segment_hls(web_path, hls_dir)
+            hls_files = sorted(os.listdir(hls_dir))
+        
+        if not current.exists():
+            return None
+        
+        if poster_path:
+            outputs['thumbnail'] = _store(poster_path, f"memories/thumbnails/{memory.pk}/{base_name}_poster.jpg")
+        outputs['video_web'] = _store(web_path, f"memories/videos/web/{memory.pk}/{base_name}.mp4")
+        # Per video, so a replacement's segments never overwrite the ones being played
+        prefix = f"memories/videos/hls/{memory.pk}/{base_name}/"
+        for filename in hls_files:
+            # Playlists reference segments by relative name, so keep names exact
+            stored = _store(os.path.join(hls_dir, filename), prefix + filename)
+            if filename == 'index.m3u8':
+                outputs['video_hls_playlist'] = stored
+    
+    if not current.update(**outputs, video_status='ready'):
+        # Replaced between the check and the update
+        return None
+    # update() skips post_save, so retire the cached dashboard cards here
+    touch_child(memory.child_id)
+    return outputs
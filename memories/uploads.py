@@ -0,0 +1,267 @@
+import logging
+import os
+import shutil
+import uuid
+from datetime import timedelta
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.utils import timezone
+from .models import UploadSession
+
+logger = logging.getLogger(__name__)
+
+# Same prefixes as the Memory file fields, so finished uploads look like form uploads
+UPLOAD_TO = {
+    'video': 'memories/videos/',
+    'audio': 'memories/audio/',
+}
+
+# Bytes read from the request stream per write while appending a chunk
+STREAM_BLOCK_SIZE = 64 * 1024
+
+class UploadError(Exception):
+    pass
+
+class LocalChunkedUpload:
+    """Appends chunks to a partial file next to MEDIA_ROOT and moves it into place on completion"""
+    name = 'local'
+    
+    def _partial_path(self, session):
+        return os.path.join(settings.MEDIA_ROOT, 'uploads', 'partial', f"{session.pk}.part")
+    
+    def start(self, session):
+        path = self._partial_path(session)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        open(path, 'wb').close()
+    
+    def status(self, session):
+        return {'bytes_received': session.bytes_received}
+    
+    def check_chunk(self, session, offset, length):
+        """Validate a chunk against the session; True if it was already committed (a retry)"""
+        if offset + length <= session.bytes_received:
+            return True
+        if offset != session.bytes_received:
+            raise UploadError(f"Expected offset {session.bytes_received}, got {offset}")
+        if length > session.chunk_size or offset + length > session.size:
+            raise UploadError("Chunk exceeds the declared upload size")
+        return False
+    
+    def append(self, session, offset, stream, length):
+        """
+        Append one chunk read from the request stream, after check_chunk() and outside any transaction.
+        The chunk is spooled to its own file with no lock held, however slow the client; only the
+        local copy into the partial file runs under the session row, claimed by compare-and-set.
+        """
+        chunk_path = f"{self._partial_path(session)}.{uuid.uuid4().hex}.chunk"
+        try:
+            with open(chunk_path, 'wb') as chunk:
+                remaining = length
+                while remaining:
+                    block = stream.read(min(STREAM_BLOCK_SIZE, remaining))
+                    if not block:
+                        raise UploadError("Chunk ended early")
+                    chunk.write(block)
+                    remaining -= len(block)
+            
+            with transaction.atomic():
+                claimed = UploadSession.objects.filter(
+                    pk=session.pk, status='pending', bytes_received=offset
+                ).update(bytes_received=offset + length)
+                if not claimed:
+                    # A concurrent retry of this chunk landed first, or the upload moved on or was aborted
+                    session.refresh_from_db(fields=['status', 'bytes_received'])
+                    if session.status == 'pending' and offset + length <= session.bytes_received:
+                        return session.bytes_received
+                    raise UploadError(f"Expected offset {session.bytes_received}, got {offset}")
+                
+                with open(self._partial_path(session), 'r+b') as partial, open(chunk_path, 'rb') as chunk:
+                    # Drop any bytes left behind by an interrupted request
+                    partial.truncate(offset)
+                    partial.seek(offset)
+                    shutil.copyfileobj(chunk, partial, STREAM_BLOCK_SIZE)
+        finally:
+            try:
+                os.remove(chunk_path)
+            except FileNotFoundError:
+                pass
+        
+        session.bytes_received = offset + length
+        return session.bytes_received
+    
+    def complete(self, session):
+        if session.bytes_received != session.size:
+            raise UploadError(f"Received {session.bytes_received} of {session.size} bytes")
+        
+        final_path = default_storage.path(session.storage_key)
+        os.makedirs(os.path.dirname(final_path), exist_ok=True)
+        os.replace(self._partial_path(session), final_path)
+    
+    def abort(self, session):
+        try:
+            os.remove(self._partial_path(session))
+        except FileNotFoundError:
+            pass
+
+class S3MultipartUpload:
+    """Presigned S3 multipart upload; parts go straight from the browser to the bucket"""
+    name = 's3'
+    
+    def __init__(self):
+        import boto3
+        self.client = boto3.client(
+            's3',
+            region_name=settings.AWS_S3_REGION_NAME,
+            aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
+            aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
+        )
+        self.bucket = settings.AWS_STORAGE_BUCKET_NAME
+    
+    def start(self, session):
+        response = self.client.create_multipart_upload(
+            Bucket=self.bucket,
+            Key=session.storage_key,
+            ContentType=session.content_type or 'application/octet-stream',
+        )
+        session.s3_upload_id = response['UploadId']
+    
+    def _list_parts(self, session):
+        parts = []
+        paginator = self.client.get_paginator('list_parts')
+        for page in paginator.paginate(Bucket=self.bucket, Key=session.storage_key, UploadId=session.s3_upload_id):
+            for part in page.get('Parts', []):
+                parts.append({'PartNumber': part['PartNumber'], 'ETag': part['ETag'], 'Size': part['Size']})
+        return parts
+    
+    def status(self, session):
+        parts = self._list_parts(session)
+        return {
+            'uploaded_parts': [part['PartNumber'] for part in parts],
+            'bytes_received': sum(part['Size'] for part in parts),
+        }
+    
+    def presign_part(self, session, part_number):
+        if not 1 <= part_number <= session.part_count:
+            raise UploadError(f"Part number must be between 1 and {session.part_count}")
+        return self.client.generate_presigned_url(
+            'upload_part',
+            Params={
+                'Bucket': self.bucket,
+                'Key': session.storage_key,
+                'UploadId': session.s3_upload_id,
+                'PartNumber': part_number,
+            },
+            ExpiresIn=3600,
+        )
+    
+    def complete(self, session):
+        # Trust the bucket's view of the parts, not the client's
+        parts = self._list_parts(session)
+        if len(parts) != session.part_count:
+            raise UploadError(f"Uploaded {len(parts)} of {session.part_count} parts")
+        
+        self.client.complete_multipart_upload(
+            Bucket=self.bucket,
+            Key=session.storage_key,
+            UploadId=session.s3_upload_id,
+            MultipartUpload={'Parts': [{'PartNumber': p['PartNumber'], 'ETag': p['ETag']} for p in parts]},
+        )
+        session.bytes_received = session.size
+    
+    def abort(self, session):
+        self.client.abort_multipart_upload(
+            Bucket=self.bucket,
+            Key=session.storage_key,
+            UploadId=session.s3_upload_id,
+        )
+
+def get_upload_backend(name=None):
+    """Backend for new sessions (or for an existing session's backend name)"""
+    name = name or ('s3' if settings.USE_S3 else 'local')
+    return S3MultipartUpload() if name == 's3' else LocalChunkedUpload()
+
+def start_upload(user, field, filename, size, content_type=''):
+    """Create an upload session with a final storage name no other session can share"""
+    if field not in UPLOAD_TO:
+        raise UploadError("Uploads are only supported for video and audio")
+    if size <= 0 or size > settings.UPLOAD_MAX_SIZE:
+        raise UploadError(f"Upload size must be between 1 byte and {settings.UPLOAD_MAX_SIZE} bytes")
+    
+    backend = get_upload_backend()
+    filename = os.path.basename(filename)
+    
+    session = UploadSession(
+        user=user,
+        field=field,
+        filename=filename,
+        content_type=content_type,
+        size=size,
+        chunk_size=settings.UPLOAD_CHUNK_SIZE,
+        backend=backend.name,
+    )
+    # The file only exists once the upload completes, so a name checked for
+    # availability now could be taken by a concurrent upload; the session's
+    # own directory cannot
+    session.storage_key = default_storage.generate_filename(f"{UPLOAD_TO[field]}{session.pk}/{filename}")
+    backend.start(session)
+    session.save()
+    return session
+
+def describe_upload(session):
+    """JSON-ready state of a session, including what a client needs to resume it"""
+    payload = {
+        'id': str(session.pk),
+        'backend': session.backend,
+        'field': session.field,
+        'size': session.size,
+        'chunk_size': session.chunk_size,
+        'part_count': session.part_count,
+        'status': session.status,
+        'bytes_received': session.bytes_received,
+    }
+    if session.status == 'pending':
+        payload.update(get_upload_backend(session.backend).status(session))
+    return payload
+
+def complete_upload(session):
+    """Commit every part; only completed sessions can be attached to a memory"""
+    if session.status in ('completed', 'consumed'):
+        return session
+    if session.status != 'pending':
+        raise UploadError("This upload was aborted")
+    
+    get_upload_backend(session.backend).complete(session)
+    session.status = 'completed'
+    session.completed_at = timezone.now()
+    session.save()
+    return session
+
+def consume_upload(session):
+    """Claim a completed upload for one memory; call inside the transaction that saves the memory"""
+    with transaction.atomic():
+        claimed = UploadSession.objects.select_for_update().filter(pk=session.pk, status='completed').first()
+        if claimed is None:
+            raise UploadError("This upload has already been attached to a memory")
+        claimed.status = session.status = 'consumed'
+        claimed.save(update_fields=['status'])
+    return session
+
+def abort_upload(session):
+    # Claimed with a conditional update, so a chunk in flight cannot resurrect the session
+    if UploadSession.objects.filter(pk=session.pk, status='pending').update(status='aborted'):
+        get_upload_backend(session.backend).abort(session)
+    session.refresh_from_db(fields=['status', 'bytes_received'])
+
+def expire_abandoned_uploads():
+    """Abort pending uploads older than UPLOAD_SESSION_TTL, releasing partial files and S3 multipart parts"""
+    cutoff = timezone.now() - timedelta(seconds=settings.UPLOAD_SESSION_TTL)
+    expired = 0
+    for session in UploadSession.objects.filter(status='pending', created_at__lt=cutoff).iterator():
+        try:
+            abort_upload(session)
+        except Exception as e:
+            logger.warning(f"Could not abort expired upload {session.pk}: {e}")
+            continue
+        expired += 1
+    return expired
\ No newline at end of file
@@ -12,4 +12,12 @@ urlpatterns = [
     path('<uuid:pk>/react/', views.ReactToMemoryView.as_view(), name='react'),
     path('<uuid:pk>/comment/', views.AddCommentView.as_view(), name='comment'),
     path('timeline/', views.TimelineView.as_view(), name='timeline'),
+    path('tags/', views.TagCloudView.as_view(), name='tags'),
+    path('map/data/', views.MemoryMapDataView.as_view(), name='map_data'),
+    path('uploads/', views.StartUploadView.as_view(), name='upload_start'),
+    path('uploads/<uuid:pk>/', views.UploadStatusView.as_view(), name='upload_status'),
+    path('uploads/<uuid:pk>/chunk/', views.UploadChunkView.as_view(), name='upload_chunk'),
+    path('uploads/<uuid:pk>/parts/<int:part_number>/', views.UploadPartUrlView.as_view(), name='upload_part_url'),
+    path('uploads/<uuid:pk>/complete/', views.CompleteUploadView.as_view(), name='upload_complete'),
+    path('cache/stats/', views.FragmentCacheStatsView.as_view(), name='fragment_cache_stats'),
 ]
\ No newline at end of file
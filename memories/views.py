@@ -1,12 +1,26 @@
-from django.contrib.auth.mixins import LoginRequiredMixin
+from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 from django.shortcuts import render, get_object_or_404, redirect
 from django.views.generic import TemplateView, ListView
 from django.contrib import messages
 from django.http import JsonResponse
-from django.db.models import Q
-from accounts.models import Child
-from .models import Memory, MemoryReaction, MemoryComment
+from django.urls import reverse
+from uuid import UUID
+from django.db import transaction
+from django.db.models import Count
+from accounts.access import (
+    can_access_child, filter_accessible, get_accessible_child, get_accessible_children
+)
+from .models import Memory, MemoryComment, MemoryReactionSummary, MemoryTag, UploadSession, parse_tags
 from .forms import MemoryForm, MemoryCommentForm
+from .fragments import get_stats as get_fragment_stats
+from .geo import bbox_filter, cluster_memories
+from .pagination import keyset_page
+from .queries import with_card_data
+from .reactions import toggle_reaction
+from .search import search_memories
+from .uploads import (
+    UploadError, abort_upload, complete_upload, describe_upload, get_upload_backend, start_upload
+)
 
 class MemoryListView(LoginRequiredMixin, ListView):
     model = Memory
@@ -16,40 +30,53 @@ class MemoryListView(LoginRequiredMixin, ListView):
     
     def get_queryset(self):
         child_id = self.request.GET.get('child')
-        queryset = Memory.objects.all()
+        queryset = with_card_data()
         
         # Filter by child access permissions
-        if self.request.user.is_owner:
-            children = Child.objects.filter(owner=self.request.user)
-        else:
-            children = self.request.user.children.all()
-        
-        queryset = queryset.filter(child__in=children)
+        queryset = filter_accessible(queryset, self.request.user)
         
         if child_id:
             queryset = queryset.filter(child_id=child_id)
         
+        # Exact tag filter through the tag index
+        tag = parse_tags(self.request.GET.get('tag'))
+        if tag:
+            queryset = queryset.filter(tag_links__tag__name=tag[0])
+        
         # Search functionality
-        search = self.request.GET.get('search')
+        search = self.request.GET.get('search', '').strip()
         if search:
-            queryset = queryset.filter(
-                Q(title__icontains=search) |
-                Q(content__icontains=search) |
-                Q(tags__icontains=search)
-            )
+            queryset = search_memories(queryset, search)
         
         return queryset
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        if self.request.user.is_owner:
-            context['children'] = Child.objects.filter(owner=self.request.user)
-        else:
-            context['children'] = self.request.user.children.all()
+        context['children'] = get_accessible_children(self.request.user)
         context['current_child'] = self.request.GET.get('child')
         context['search_query'] = self.request.GET.get('search', '')
+        context['current_tag'] = self.request.GET.get('tag', '')
         return context
 
+class TagCloudView(LoginRequiredMixin, TemplateView):
+    def get(self, request):
+        links = filter_accessible(MemoryTag.objects.all(), request.user)
+        
+        child_id = request.GET.get('child')
+        if child_id:
+            links = links.filter(child_id=child_id)
+        
+        # One grouped query over the (child, tag) index
+        facets = links.values('tag__name').annotate(count=Count('id')).order_by('-count', 'tag__name')
+        
+        limit = request.GET.get('limit')
+        if limit and limit.isdigit():
+            facets = facets[:int(limit)]
+        
+        return JsonResponse({
+            'tags': [{'name': facet['tag__name'], 'count': facet['count']} for facet in facets]
+        })
+
 class MemoryDetailView(LoginRequiredMixin, TemplateView):
     template_name = 'memories/detail.html'
     
@@ -70,9 +97,7 @@ class MemoryDetailView(LoginRequiredMixin, TemplateView):
         return context
     
     def _has_permission(self, memory):
-        user = self.request.user
-        return (user.is_owner and memory.child.owner == user) or \
-               memory.child in user.children.all()
+        return can_access_child(self.request.user, memory.child_id)
 
 class AddMemoryView(LoginRequiredMixin, TemplateView):
     template_name = 'memories/add.html'
@@ -85,12 +110,17 @@ class AddMemoryView(LoginRequiredMixin, TemplateView):
     def post(self, request):
         form = MemoryForm(request.POST, request.FILES, user=request.user)
         if form.is_valid():
-            memory = form.save(commit=False)
-            memory.created_by = request.user
-            memory.save()
-            
-            messages.success(request, "Memory added successfully!")
-            return redirect('memories:detail', pk=memory.pk)
+            try:
+                # The upload sessions are claimed only if the memory is saved
+                with transaction.atomic():
+                    memory = form.save(commit=False)
+                    memory.created_by = request.user
+                    memory.save()
+            except UploadError as e:
+                form.add_error(None, str(e))
+            else:
+                messages.success(request, "Memory added successfully!")
+                return redirect('memories:detail', pk=memory.pk)
         
         return render(request, self.template_name, {'form': form})
 
@@ -109,9 +139,14 @@ class EditMemoryView(LoginRequiredMixin, TemplateView):
         form = MemoryForm(request.POST, request.FILES, instance=memory, user=request.user)
         
         if form.is_valid():
-            form.save()
-            messages.success(request, "Memory updated successfully!")
-            return redirect('memories:detail', pk=memory.pk)
+            try:
+                with transaction.atomic():
+                    form.save()
+            except UploadError as e:
+                form.add_error(None, str(e))
+            else:
+                messages.success(request, "Memory updated successfully!")
+                return redirect('memories:detail', pk=memory.pk)
         
         return render(request, self.template_name, {
             'memory': memory,
@@ -137,31 +172,17 @@ class ReactToMemoryView(LoginRequiredMixin, TemplateView):
         memory = get_object_or_404(Memory, pk=pk)
         reaction = request.POST.get('reaction')
         
+        if not can_access_child(request.user, memory.child_id):
+            return JsonResponse({'error': 'Permission denied'}, status=403)
+        
         if not reaction:
             return JsonResponse({'error': 'No reaction provided'}, status=400)
         
-        # Toggle reaction
-        existing_reaction = MemoryReaction.objects.filter(
-            memory=memory, 
-            user=request.user, 
-            reaction=reaction
-        ).first()
-        
-        if existing_reaction:
-            existing_reaction.delete()
-            action = 'removed'
-        else:
-            MemoryReaction.objects.create(
-                memory=memory,
-                user=request.user,
-                reaction=reaction
-            )
-            action = 'added'
+        if reaction not in MemoryReactionSummary.COUNT_FIELDS:
+            return JsonResponse({'error': 'Unknown reaction'}, status=400)
         
-        # Get updated reaction counts
-        reaction_counts = {}
-        for r in memory.reactions.values('reaction').distinct():
-            reaction_counts[r['reaction']] = memory.reactions.filter(reaction=r['reaction']).count()
+        # Toggle reaction and move the counters in the same transaction
+        action, reaction_counts = toggle_reaction(memory, request.user, reaction)
         
         return JsonResponse({
             'action': action,
@@ -171,6 +192,11 @@ class ReactToMemoryView(LoginRequiredMixin, TemplateView):
 class AddCommentView(LoginRequiredMixin, TemplateView):
     def post(self, request, pk):
         memory = get_object_or_404(Memory, pk=pk)
+        
+        if not can_access_child(request.user, memory.child_id):
+            messages.error(request, "You don't have permission to comment on this memory.")
+            return redirect('memories:list')
+        
         form = MemoryCommentForm(request.POST)
         
         if form.is_valid():
@@ -190,35 +216,168 @@ class AddCommentView(LoginRequiredMixin, TemplateView):
 
 class TimelineView(LoginRequiredMixin, TemplateView):
     template_name = 'memories/timeline.html'
+    partial_template_name = 'memories/partials/timeline_items.html'
+    page_size = 20
+    
+    def get_template_names(self):
+        # Later batches are appended by HTMX as the user scrolls
+        if self.request.htmx and self.request.GET.get('cursor'):
+            return [self.partial_template_name]
+        return [self.template_name]
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         
         # Get child parameter
-        child_id = self.request.GET.get('child')
-        child = None
-        
-        if child_id:
-            if self.request.user.is_owner:
-                child = get_object_or_404(Child, id=child_id, owner=self.request.user)
-            else:
-                child = get_object_or_404(Child, id=child_id, family_members=self.request.user)
-        else:
-            # Default to first accessible child
-            if self.request.user.is_owner:
-                child = Child.objects.filter(owner=self.request.user).first()
-            else:
-                child = self.request.user.children.first()
+        child = get_accessible_child(self.request.user, self.request.GET.get('child'))
         
         if child:
-            memories = Memory.objects.filter(child=child).order_by('-memory_date')
+            memories, next_cursor = keyset_page(
+                with_card_data(Memory.objects.filter(child=child)),
+                cursor=self.request.GET.get('cursor'),
+                page_size=self.page_size,
+            )
             context['memories'] = memories
+            context['next_cursor'] = next_cursor
             context['child'] = child
         
         # Available children for switcher
-        if self.request.user.is_owner:
-            context['children'] = Child.objects.filter(owner=self.request.user)
-        else:
-            context['children'] = self.request.user.children.all()
+        context['children'] = get_accessible_children(self.request.user)
         
-        return context
\ No newline at end of file
+        return context
+
+class StartUploadView(LoginRequiredMixin, TemplateView):
+    def post(self, request):
+        try:
+            size = int(request.POST.get('size', 0))
+        except ValueError:
+            return JsonResponse({'error': 'Invalid size'}, status=400)
+        
+        try:
+            session = start_upload(
+                request.user,
+                field=request.POST.get('field'),
+                filename=request.POST.get('filename', ''),
+                size=size,
+                content_type=request.POST.get('content_type', ''),
+            )
+        except UploadError as e:
+            return JsonResponse({'error': str(e)}, status=400)
+        
+        return JsonResponse(describe_upload(session), status=201)
+
+class UploadStatusView(LoginRequiredMixin, TemplateView):
+    def get(self, request, pk):
+        session = get_object_or_404(UploadSession, pk=pk, user=request.user)
+        return JsonResponse(describe_upload(session))
+    
+    def delete(self, request, pk):
+        session = get_object_or_404(UploadSession, pk=pk, user=request.user)
+        abort_upload(session)
+        return JsonResponse(describe_upload(session))
+
+class UploadChunkView(LoginRequiredMixin, TemplateView):
+    def put(self, request, pk):
+        try:
+            offset = int(request.headers.get('Upload-Offset', ''))
+            length = int(request.META.get('CONTENT_LENGTH') or 0)
+        except ValueError:
+            return JsonResponse({'error': 'Upload-Offset and Content-Length are required'}, status=400)
+        
+        # Validate the offset under the row lock, then release it before reading the body:
+        # a slow client must not hold a lock and an open transaction for the whole transfer
+        with transaction.atomic():
+            session = get_object_or_404(
+                UploadSession.objects.select_for_update(), pk=pk, user=request.user, backend='local'
+            )
+            if session.status != 'pending':
+                return JsonResponse({'error': 'Upload is no longer accepting chunks'}, status=409)
+            
+            backend = get_upload_backend(session.backend)
+            try:
+                committed = backend.check_chunk(session, offset, length)
+            except UploadError as e:
+                return JsonResponse({'error': str(e), 'bytes_received': session.bytes_received}, status=409)
+        
+        if committed:
+            return JsonResponse({'bytes_received': session.bytes_received})
+        
+        try:
+            # Read straight from the request stream; the chunk is never buffered in memory
+            bytes_received = backend.append(session, offset, request, length)
+        except UploadError as e:
+            return JsonResponse({'error': str(e), 'bytes_received': session.bytes_received}, status=409)
+        
+        return JsonResponse({'bytes_received': bytes_received})
+
+class UploadPartUrlView(LoginRequiredMixin, TemplateView):
+    def get(self, request, pk, part_number):
+        session = get_object_or_404(UploadSession, pk=pk, user=request.user, backend='s3', status='pending')
+        
+        try:
+            url = get_upload_backend(session.backend).presign_part(session, part_number)
+        except UploadError as e:
+            return JsonResponse({'error': str(e)}, status=400)
+        
+        return JsonResponse({'part_number': part_number, 'url': url})
+
+class CompleteUploadView(LoginRequiredMixin, TemplateView):
+    def post(self, request, pk):
+        session = get_object_or_404(UploadSession, pk=pk, user=request.user)
+        
+        try:
+            complete_upload(session)
+        except UploadError as e:
+            return JsonResponse({'error': str(e)}, status=409)
+        
+        return JsonResponse(describe_upload(session))
+
+class MemoryMapDataView(LoginRequiredMixin, TemplateView):
+    def get(self, request):
+        child_id = request.GET.get('child')
+        if not child_id:
+            return JsonResponse({'error': 'child is required'}, status=400)
+        child = get_accessible_child(request.user, child_id)
+        
+        if not child.has_feature('memory_map'):
+            return JsonResponse({'error': 'Memory Map unlocks when your child turns 2 years old'}, status=403)
+        
+        try:
+            west, south, east, north = [float(value) for value in request.GET.get('bbox', '').split(',')]
+            zoom = int(request.GET.get('zoom', 0))
+        except ValueError:
+            return JsonResponse({'error': 'bbox=west,south,east,north and zoom are required'}, status=400)
+        
+        memories = Memory.objects.filter(child=child).filter(bbox_filter(west, south, east, north))
+        clusters = list(cluster_memories(memories, zoom))
+        
+        # One more query for the preview memory of every cluster
+        samples = Memory.objects.filter(pk__in=[c['sample_id'] for c in clusters]).only(
+            'id', 'title', 'thumbnail', 'image', 'memory_date'
+        ).in_bulk()
+        
+        data = []
+        for cluster in clusters:
+            sample = samples.get(UUID(cluster['sample_id']))
+            data.append({
+                'geohash': cluster['cell'],
+                'count': cluster['count'],
+                'lat': float(cluster['center_latitude']),
+                'lng': float(cluster['center_longitude']),
+                'memory': {
+                    'id': str(sample.pk),
+                    'title': sample.title,
+                    'thumbnail': sample.card_image_url,
+                    'url': reverse('memories:detail', args=[sample.pk]),
+                } if sample else None,
+            })
+        
+        return JsonResponse({'zoom': zoom, 'clusters': data})
+
+class FragmentCacheStatsView(LoginRequiredMixin, UserPassesTestMixin, TemplateView):
+    """Hit and miss counters of the memory card fragment cache, for staff"""
+    def test_func(self):
+        return self.request.user.is_staff
+    
+    def get(self, request):
+        return JsonResponse(get_fragment_stats())
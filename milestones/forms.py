@@ -1,6 +1,6 @@
 from django import forms
 from .models import ChildMilestone, GrowthRecord
-from accounts.models import Child
+from accounts.access import accessible_children
 
 class ChildMilestoneForm(forms.ModelForm):
     class Meta:
@@ -20,10 +20,7 @@ class ChildMilestoneForm(forms.ModelForm):
         super().__init__(*args, **kwargs)
         
         if user:
-            if user.is_owner:
-                self.fields['child'].queryset = Child.objects.filter(owner=user)
-            else:
-                self.fields['child'].queryset = user.children.all()
+            self.fields['child'].queryset = accessible_children(user)
         
         # Make predefined_milestone optional when custom_title is provided
         self.fields['predefined_milestone'].required = False
@@ -58,7 +55,4 @@ class GrowthRecordForm(forms.ModelForm):
         super().__init__(*args, **kwargs)
         
         if user:
-            if user.is_owner:
-                self.fields['child'].queryset = Child.objects.filter(owner=user)
-            else:
-                self.fields['child'].queryset = user.children.all()
\ No newline at end of file
+            self.fields['child'].queryset = accessible_children(user)
\ No newline at end of file
@@ -0,0 +1,152 @@
+import csv
+import math
+from functools import lru_cache
+from pathlib import Path
+from statistics import NormalDist
+import numpy as np
+from django.core.cache import cache
+from django.utils import timezone
+from .models import GrowthRecord
+
+# WHO Child Growth Standards up to 24 months (head circumference to 60 months),
+# CDC 2000 growth charts from 24 months to 20 years; one LMS row per age
+REFERENCE_DIR = Path(__file__).resolve().parent / 'growth_reference'
+
+# Average month length, the convention the reference tables use for ages
+DAYS_PER_MONTH = 30.4375
+
+# Percentile curves drawn behind the child's measurements
+PERCENTILE_BANDS = [3, 15, 50, 85, 97]
+BAND_ZSCORES = np.array([NormalDist().inv_cdf(p / 100) for p in PERCENTILE_BANDS])
+
+UNITS = {
+    'height': 'cm',
+    'weight': 'kg',
+    'head_circumference': 'cm',
+}
+
+# The bands run up to the child's current age, so a day is as stale as a chart gets
+CHART_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Abramowitz & Stegun 7.1.26: erf(x) ~ 1 - (a1 t + ... + a5 t^5) exp(-x^2), t = 1 / (1 + p x),
+# for x >= 0 with absolute error below 1.5e-7, far under the 0.1 percentile points are shown to
+ERF_P = 0.3275911
+ERF_COEFFICIENTS = [1.061405429, -1.453152027, 1.421413741, -0.284496736, 0.254829592, 0]
+
+def chart_cache_key(child_id):
+    return f"growth:chart:{child_id}"
+
+def invalidate_growth_chart(child_id):
+    cache.delete(chart_cache_key(child_id))
+
+@lru_cache(maxsize=None)
+def load_reference(measurement_type, sex):
+    """Arrays (age_months, L, M, S) of the reference table, or None if there is none for this sex"""
+    path = REFERENCE_DIR / f"{measurement_type}.csv"
+    if not sex or not path.exists():
+        return None
+    with open(path, newline='') as f:
+        rows = [
+            [float(row['age_months']), float(row['L']), float(row['M']), float(row['S'])]
+            for row in csv.DictReader(f) if row['sex'] == sex
+        ]
+    if not rows:
+        return None
+    return tuple(np.array(rows).T)
+
+def lms_zscores(values, L, M, S):
+    """z = ((x / M) ** L - 1) / (L * S), or ln(x / M) / S where L is zero"""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ratio = values / M
+        return np.where(L == 0, np.log(ratio) / S, (np.power(ratio, L) - 1) / (L * S))
+
+def lms_values(z, L, M, S):
+    """Measurement at z-score z, the inverse of lms_zscores"""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(L == 0, M * np.exp(S * z), M * np.power(1 + L * S * z, 1 / L))
+
+def erf(x):
+    """Elementwise error function as whole-array operations; NaN stays NaN"""
+    x = np.asarray(x, dtype=float)
+    t = 1 / (1 + ERF_P * np.abs(x))
+    return np.sign(x) * (1 - np.polyval(ERF_COEFFICIENTS, t) * np.exp(-x * x))
+
+def normal_cdf(z):
+    return 0.5 * (1 + erf(z / math.sqrt(2)))
+
+def _rounded(value, digits):
+    return None if math.isnan(value) else round(float(value), digits)
+
+def reference_bands(reference, max_age):
+    """Percentile curves as [age_months, value] pairs, from birth to max_age"""
+    ages, L, M, S = reference
+    within = ages <= max_age + 1
+    ages, L, M, S = ages[within], L[within], M[within], S[within]
+    
+    # One row per percentile, one column per reference age
+    curves = lms_values(BAND_ZSCORES[:, np.newaxis], L, M, S)
+    return {
+        str(p): [[round(float(age), 2), round(float(value), 2)] for age, value in zip(ages, curve)]
+        for p, curve in zip(PERCENTILE_BANDS, curves)
+    }
+
+def measurement_series(child, measurement_type, rows):
+    """Chart series for one measurement type: the child's points with z-scores and percentiles, plus reference bands"""
+    dates = [timezone.localdate(measured_at) for _, measured_at in rows]
+    ages = np.array([(date - child.birth_date).days for date in dates], dtype=float) / DAYS_PER_MONTH
+    values = np.array([float(value) for value, _ in rows])
+    zscores = percentiles = np.full(len(rows), np.nan)
+    bands = {}
+    
+    reference = load_reference(measurement_type, child.sex)
+    if reference is not None:
+        ref_ages, L, M, S = reference
+        if rows:
+            # Ages outside the reference range get no score rather than an extrapolated one
+            lms = [np.interp(ages, ref_ages, column, left=np.nan, right=np.nan) for column in (L, M, S)]
+            zscores = lms_zscores(values, *lms)
+            percentiles = normal_cdf(zscores) * 100
+        max_age = max(child.age_in_days / DAYS_PER_MONTH, ages.max() if rows else 0)
+        bands = reference_bands(reference, max_age)
+    
+    return {
+        'label': dict(GrowthRecord.MEASUREMENT_TYPES)[measurement_type],
+        'unit': UNITS[measurement_type],
+        'points': [
+            {
+                'date': date.isoformat(),
+                'age_months': round(float(age), 2),
+                'value': float(value),
+                'z_score': _rounded(z, 2),
+                'percentile': _rounded(percentile, 1),
+            }
+            for date, age, value, z, percentile in zip(dates, ages, values, zscores, percentiles)
+        ],
+        'bands': bands,
+    }
+
+def build_growth_chart(child):
+    """Chart-ready series for every measurement type, from a single query of the child's records"""
+    rows = {measurement_type: [] for measurement_type, _ in GrowthRecord.MEASUREMENT_TYPES}
+    records = GrowthRecord.objects.filter(child=child).order_by('measurement_date').values_list(
+        'measurement_type', 'value', 'measurement_date'
+    )
+    for measurement_type, value, measured_at in records:
+        rows[measurement_type].append((value, measured_at))
+    
+    return {
+        'child': child.id,
+        'sex': child.sex,
+        'series': {
+            measurement_type: measurement_series(child, measurement_type, measurement_rows)
+            for measurement_type, measurement_rows in rows.items()
+        },
+    }
+
+def get_growth_chart(child):
+    """The child's growth chart data, cached until one of their records or their profile changes"""
+    chart = cache.get(chart_cache_key(child.id))
+    if chart is None:
+        chart = build_growth_chart(child)
+        cache.set(chart_cache_key(child.id), chart, CHART_CACHE_TIMEOUT)
+    return chart
@@ -0,0 +1,229 @@
+import csv
+import io
+import json
+from datetime import datetime, time
+from decimal import Decimal, InvalidOperation
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from core.dashboard import touch_child
+from .growth import invalidate_growth_chart
+from .models import ChildMilestone, GrowthRecord, PredefinedMilestone
+
+# Rows validated and written per statement
+IMPORT_BATCH_SIZE = 500
+
+IMPORT_KINDS = ['growth', 'milestones']
+
+# A re-imported measurement or milestone replaces these; created_at is kept
+GROWTH_UPDATE_FIELDS = ['value', 'age_at_measurement', 'age_in_days', 'recorded_by', 'notes']
+MILESTONE_UPDATE_FIELDS = ['description', 'achieved_date', 'age_at_achievement', 'age_in_days', 'notes', 'updated_at']
+
+# value is DecimalField(max_digits=6, decimal_places=2)
+MAX_GROWTH_VALUE = Decimal('9999.99')
+
+def read_rows(file, name):
+    """Row dicts of a binary CSV file, read as a stream, or of a JSON file holding an array of objects"""
+    if name.lower().endswith('.json'):
+        rows = json.load(file)
+        if not isinstance(rows, list):
+            raise ValueError("A JSON import must be an array of objects")
+        yield from rows
+    else:
+        yield from csv.DictReader(io.TextIOWrapper(file, encoding='utf-8-sig', newline=''))
+
+def batched(rows, size):
+    """(row_number, row) pairs in lists of `size`, numbered from 1"""
+    batch = []
+    for number, row in enumerate(rows, start=1):
+        batch.append((number, row))
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def age_label(child, moment):
+    """The "N months old" label the add views store"""
+    return f"{(moment.date() - child.birth_date).days // 30} months old"
+
+def _text(row, field):
+    value = row.get(field)
+    return '' if value is None else str(value).strip()
+
+def _moment(child, row, field):
+    value = _text(row, field)
+    try:
+        moment = parse_datetime(value)
+        if moment is None:
+            day = parse_date(value)
+            moment = datetime.combine(day, time.min) if day else None
+    except ValueError:
+        moment = None
+    if moment is None:
+        raise ValidationError({field: "Enter a date as YYYY-MM-DD or an ISO 8601 date and time."})
+    
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    if moment.date() < child.birth_date:
+        raise ValidationError({field: "Date is before the child's birth date."})
+    return moment
+
+def growth_record(child, user, row):
+    """Unsaved GrowthRecord for an import row, or ValidationError naming the bad fields"""
+    errors = {}
+    measurement_type = _text(row, 'measurement_type')
+    if measurement_type not in dict(GrowthRecord.MEASUREMENT_TYPES):
+        errors['measurement_type'] = f"Must be one of {', '.join(dict(GrowthRecord.MEASUREMENT_TYPES))}."
+    
+    try:
+        value = Decimal(_text(row, 'value')).quantize(Decimal('0.01'))
+        if not 0 < value <= MAX_GROWTH_VALUE:
+            errors['value'] = f"Must be greater than 0 and at most {MAX_GROWTH_VALUE}."
+    except InvalidOperation:
+        errors['value'] = "Enter a number."
+    
+    try:
+        measurement_date = _moment(child, row, 'measurement_date')
+    except ValidationError as e:
+        errors.update(e.message_dict)
+    
+    if errors:
+        raise ValidationError(errors)
+    return GrowthRecord(
+        child=child,
+        measurement_type=measurement_type,
+        value=value,
+        measurement_date=measurement_date,
+        age_at_measurement=age_label(child, measurement_date),
+        age_in_days=child.days_old_at(measurement_date),
+        recorded_by=user,
+        notes=_text(row, 'notes'),
+    )
+
+def child_milestone(child, user, row, predefined_ids):
+    """Unsaved ChildMilestone for an import row; a title matching a predefined milestone links to it"""
+    errors = {}
+    title = _text(row, 'title')
+    if not title:
+        errors['title'] = "This field is required."
+    
+    try:
+        achieved_date = _moment(child, row, 'achieved_date')
+    except ValidationError as e:
+        errors.update(e.message_dict)
+    
+    if errors:
+        raise ValidationError(errors)
+    predefined_id = predefined_ids.get(title.lower())
+    return ChildMilestone(
+        child=child,
+        predefined_milestone_id=predefined_id,
+        custom_title='' if predefined_id else title,
+        is_custom=not predefined_id,
+        description=_text(row, 'description'),
+        achieved_date=achieved_date,
+        age_at_achievement=age_label(child, achieved_date),
+        age_in_days=child.days_old_at(achieved_date),
+        recorded_by=user,
+        notes=_text(row, 'notes'),
+        updated_at=timezone.now(),
+    )
+
+def _milestone_key(milestone):
+    if milestone.is_custom:
+        return ('custom', milestone.custom_title)
+    return ('predefined', milestone.predefined_milestone_id)
+
+def _validate(batch, build, key):
+    """Objects keyed by their identity, and per-row errors; the last of several rows for one identity wins"""
+    objects, errors = {}, []
+    for number, row in batch:
+        if not isinstance(row, dict):
+            errors.append({'row': number, 'errors': {'__all__': ["Expected an object with named fields."]}})
+            continue
+        try:
+            obj = build(row)
+        except ValidationError as e:
+            errors.append({'row': number, 'errors': e.message_dict})
+            continue
+        objects[key(obj)] = obj
+    return objects, errors
+
+def save_growth_batch(child, user, batch):
+    records, errors = _validate(
+        batch,
+        lambda row: growth_record(child, user, row),
+        lambda record: (record.measurement_type, record.measurement_date),
+    )
+    if records:
+        # One upsert per batch against unique_together (child, measurement_type, measurement_date)
+        GrowthRecord.objects.bulk_create(
+            records.values(),
+            update_conflicts=True,
+            unique_fields=['child', 'measurement_type', 'measurement_date'],
+            update_fields=GROWTH_UPDATE_FIELDS,
+        )
+    return len(records), errors
+
+def save_milestone_batch(child, user, batch, predefined_ids):
+    milestones, errors = _validate(
+        batch,
+        lambda row: child_milestone(child, user, row, predefined_ids),
+        _milestone_key,
+    )
+    if not milestones:
+        return 0, errors
+    
+    # ChildMilestone has no unique constraint to upsert against, so match the
+    # batch to the child's existing milestones in one query instead
+    predefined = [key[1] for key in milestones if key[0] == 'predefined']
+    custom = [key[1] for key in milestones if key[0] == 'custom']
+    existing = ChildMilestone.objects.filter(child=child).filter(
+        Q(is_custom=False, predefined_milestone_id__in=predefined) | Q(is_custom=True, custom_title__in=custom)
+    ).values_list('pk', 'is_custom', 'custom_title', 'predefined_milestone_id')
+    existing_pks = {
+        ('custom', title) if is_custom else ('predefined', predefined_id): pk
+        for pk, is_custom, title, predefined_id in existing
+    }
+    
+    to_create, to_update = [], []
+    for key, milestone in milestones.items():
+        if key in existing_pks:
+            milestone.pk = existing_pks[key]
+            to_update.append(milestone)
+        else:
+            to_create.append(milestone)
+    ChildMilestone.objects.bulk_create(to_create)
+    ChildMilestone.objects.bulk_update(to_update, MILESTONE_UPDATE_FIELDS)
+    return len(milestones), errors
+
+def import_rows(kind, child, user, rows, batch_size=IMPORT_BATCH_SIZE):
+    """
+    Validate and upsert import rows for a child in batches, yielding a report per batch:
+    {'batch', 'rows', 'imported', 'errors': [{'row', 'errors': {field: [messages]}}]}.
+    Each batch is written in its own transaction; rows with errors are skipped.
+    """
+    if kind == 'milestones':
+        predefined_ids = {
+            title.strip().lower(): pk for pk, title in PredefinedMilestone.objects.values_list('pk', 'title')
+        }
+    
+    rows_seen = 0
+    try:
+        for number, batch in enumerate(batched(rows, batch_size), start=1):
+            with transaction.atomic():
+                if kind == 'milestones':
+                    imported, errors = save_milestone_batch(child, user, batch, predefined_ids)
+                else:
+                    imported, errors = save_growth_batch(child, user, batch)
+            rows_seen += len(batch)
+            yield {'batch': number, 'rows': rows_seen, 'imported': imported, 'errors': errors}
+    finally:
+        # bulk_create() and bulk_update() skip the post_save signals that normally retire
+        # the cached chart and dashboard summary; each batch has committed by now
+        if kind == 'growth':
+            invalidate_growth_chart(child.id)
+        touch_child(child.id)
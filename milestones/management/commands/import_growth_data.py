@@ -0,0 +1,44 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from accounts.models import Child
+from milestones.imports import IMPORT_BATCH_SIZE, IMPORT_KINDS, import_rows, read_rows
+
+class Command(BaseCommand):
+    help = 'Import growth records or milestones for a child from a CSV or JSON file'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('child_id', type=int)
+        parser.add_argument('path', help='CSV with a header row, or JSON array of objects')
+        parser.add_argument('--kind', choices=IMPORT_KINDS, default='growth')
+        parser.add_argument('--user', help="Username recorded as the author (default: the child's owner)")
+        parser.add_argument('--batch-size', type=int, default=IMPORT_BATCH_SIZE)
+    
+    def handle(self, *args, **options):
+        try:
+            child = Child.objects.select_related('owner').get(pk=options['child_id'])
+        except Child.DoesNotExist:
+            raise CommandError(f"Child {options['child_id']} does not exist")
+        
+        user = child.owner
+        if options['user']:
+            try:
+                user = get_user_model().objects.get(username=options['user'])
+            except get_user_model().DoesNotExist:
+                raise CommandError(f"User {options['user']} does not exist")
+        
+        imported = failed = 0
+        with open(options['path'], 'rb') as f:
+            try:
+                for report in import_rows(
+                    options['kind'], child, user, read_rows(f, options['path']), options['batch_size']
+                ):
+                    imported += report['imported']
+                    failed += len(report['errors'])
+                    for error in report['errors']:
+                        for field, messages in error['errors'].items():
+                            self.stderr.write(f"Row {error['row']}: {field}: {' '.join(messages)}")
+                    self.stdout.write(f"Imported {imported} of {report['rows']} rows...")
+            except ValueError as e:
+                raise CommandError(f"Could not read {options['path']}: {e}")
+        
+        self.stdout.write(self.style.SUCCESS(f"Imported {imported} {options['kind']} rows for {child.name}, {failed} rejected"))
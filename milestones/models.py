@@ -25,6 +25,9 @@ class PredefinedMilestone(models.Model):
     
     class Meta:
         ordering = ['order', 'typical_age_months_min']
+        indexes = [
+            models.Index(fields=['typical_age_months_min', 'typical_age_months_max'], name='milestone_age_window_idx'),
+        ]
     
     def __str__(self):
         return self.title
@@ -36,6 +39,7 @@ class ChildMilestone(models.Model):
     description = models.TextField(blank=True)
     achieved_date = models.DateTimeField()
     age_at_achievement = models.CharField(max_length=50, blank=True)  # e.g., "6 months, 2 weeks"
+    age_in_days = models.IntegerField(null=True, blank=True, editable=False, help_text="Child's age on achieved_date")
     recorded_by = models.ForeignKey(User, on_delete=models.CASCADE)
     notes = models.TextField(blank=True)
     photo = models.ImageField(upload_to='milestones/', blank=True, null=True)
@@ -45,11 +49,18 @@ class ChildMilestone(models.Model):
     
     class Meta:
         ordering = ['achieved_date']
+        indexes = [
+            models.Index(fields=['child', 'age_in_days'], name='milestone_child_age_idx'),
+        ]
     
     def __str__(self):
         title = self.custom_title if self.is_custom else self.predefined_milestone.title
         return f"{self.child.name}: {title}"
     
+    def save(self, *args, **kwargs):
+        self.age_in_days = self.child.days_old_at(self.achieved_date)
+        super().save(*args, **kwargs)
+    
     @property
     def title(self):
         return self.custom_title if self.is_custom else self.predefined_milestone.title
@@ -66,6 +77,7 @@ class GrowthRecord(models.Model):
     value = models.DecimalField(max_digits=6, decimal_places=2)  # in cm for height, kg for weight
     measurement_date = models.DateTimeField()
     age_at_measurement = models.CharField(max_length=50, blank=True)
+    age_in_days = models.IntegerField(null=True, blank=True, editable=False, help_text="Child's age on measurement_date")
     recorded_by = models.ForeignKey(User, on_delete=models.CASCADE)
     notes = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
@@ -73,6 +85,13 @@ class GrowthRecord(models.Model):
     class Meta:
         ordering = ['measurement_date']
         unique_together = ['child', 'measurement_type', 'measurement_date']
+        indexes = [
+            models.Index(fields=['child', 'age_in_days'], name='growth_child_age_idx'),
+        ]
     
     def __str__(self):
-        return f"{self.child.name}: {self.measurement_type} - {self.value}"
\ No newline at end of file
+        return f"{self.child.name}: {self.measurement_type} - {self.value}"
+    
+    def save(self, *args, **kwargs):
+        self.age_in_days = self.child.days_old_at(self.measurement_date)
+        super().save(*args, **kwargs)
\ No newline at end of file
@@ -0,0 +1,24 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from accounts.models import Child
+from .growth import invalidate_growth_chart
+from .models import GrowthRecord, MilestoneCategory, PredefinedMilestone
+from .suggestions import clear_catalog
+
+@receiver(post_save, sender=PredefinedMilestone)
+@receiver(post_delete, sender=PredefinedMilestone)
+@receiver(post_save, sender=MilestoneCategory)
+@receiver(post_delete, sender=MilestoneCategory)
+def reload_milestone_catalog(sender, **kwargs):
+    """Other processes pick up catalog edits when their copy expires"""
+    clear_catalog()
+
+@receiver(post_save, sender=GrowthRecord)
+@receiver(post_delete, sender=GrowthRecord)
+def growth_record_changed(sender, instance, **kwargs):
+    invalidate_growth_chart(instance.child_id)
+
+@receiver(post_save, sender=Child)
+def child_profile_changed(sender, instance, **kwargs):
+    """Birth date and sex decide the ages and reference tables of the chart"""
+    invalidate_growth_chart(instance.pk)
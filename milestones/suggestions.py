@@ -0,0 +1,74 @@
+import threading
+import time
+from bisect import bisect_right
+from .models import ChildMilestone, PredefinedMilestone
+
+# The catalog only changes through the admin; each process reloads it after
+# CATALOG_TTL seconds, or at once when this process saves a catalog row
+CATALOG_TTL = 10 * 60
+
+# How far ahead upcoming milestones reach, and how far back missed ones stay relevant
+UPCOMING_MONTHS = 3
+OVERDUE_MONTHS = 6
+
+class MilestoneCatalog:
+    """Every predefined milestone with its category, sorted by the start of its age window"""
+    def __init__(self):
+        self.milestones = list(
+            PredefinedMilestone.objects.select_related('category').order_by(
+                'typical_age_months_min', 'typical_age_months_max', 'order'
+            )
+        )
+        self.min_ages = [milestone.typical_age_months_min for milestone in self.milestones]
+        self.loaded_at = time.monotonic()
+    
+    def starting_by(self, age_months):
+        """Milestones whose window opens at or before the given age"""
+        return self.milestones[:bisect_right(self.min_ages, age_months)]
+
+_catalog = None
+_catalog_lock = threading.Lock()
+
+def get_catalog():
+    global _catalog
+    catalog = _catalog
+    if catalog is None or time.monotonic() - catalog.loaded_at > CATALOG_TTL:
+        with _catalog_lock:
+            if _catalog is catalog:
+                _catalog = MilestoneCatalog()
+            catalog = _catalog
+    return catalog
+
+def clear_catalog():
+    global _catalog
+    _catalog = None
+
+def suggest_milestones(child, age_months=None):
+    """
+    Unachieved milestones that are overdue, due or upcoming at the child's age, grouped by category:
+    [{'category': ..., 'overdue': [...], 'due': [...], 'upcoming': [...]}, ...]
+    """
+    if age_months is None:
+        age_months = child.age_in_months
+    achieved = set(ChildMilestone.objects.filter(
+        child=child, predefined_milestone__isnull=False
+    ).values_list('predefined_milestone_id', flat=True))
+    
+    groups = {}
+    for milestone in get_catalog().starting_by(age_months + UPCOMING_MONTHS):
+        if milestone.id in achieved or milestone.typical_age_months_max < age_months - OVERDUE_MONTHS:
+            continue
+        
+        if milestone.typical_age_months_max < age_months:
+            window = 'overdue'
+        elif milestone.typical_age_months_min <= age_months:
+            window = 'due'
+        else:
+            window = 'upcoming'
+        
+        group = groups.setdefault(milestone.category_id, {
+            'category': milestone.category, 'overdue': [], 'due': [], 'upcoming': [],
+        })
+        group[window].append(milestone)
+    
+    return sorted(groups.values(), key=lambda group: group['category'].name)
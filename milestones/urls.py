@@ -8,5 +8,7 @@ urlpatterns = [
     path('add/', views.AddMilestoneView.as_view(), name='add'),
     path('<int:pk>/edit/', views.EditMilestoneView.as_view(), name='edit'),
     path('growth/', views.GrowthChartView.as_view(), name='growth_chart'),
+    path('growth/data/', views.GrowthChartDataView.as_view(), name='growth_chart_data'),
     path('growth/add/', views.AddGrowthRecordView.as_view(), name='add_growth'),
+    path('import/', views.ImportDataView.as_view(), name='import'),
 ]
\ No newline at end of file
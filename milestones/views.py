@@ -1,10 +1,15 @@
 from django.contrib.auth.mixins import LoginRequiredMixin
+import json
+from django.http import JsonResponse, StreamingHttpResponse
 from django.shortcuts import render, get_object_or_404, redirect
 from django.views.generic import TemplateView, ListView
 from django.contrib import messages
-from accounts.models import Child
-from .models import ChildMilestone, PredefinedMilestone, GrowthRecord, MilestoneCategory
+from accounts.access import get_accessible_child, get_accessible_children
+from .models import ChildMilestone
 from .forms import ChildMilestoneForm, GrowthRecordForm
+from .growth import get_growth_chart
+from .imports import IMPORT_KINDS, import_rows, read_rows
+from .suggestions import suggest_milestones
 
 class MilestoneListView(LoginRequiredMixin, TemplateView):
     template_name = 'milestones/list.html'
@@ -13,19 +18,7 @@ class MilestoneListView(LoginRequiredMixin, TemplateView):
         context = super().get_context_data(**kwargs)
         
         # Get child
-        child_id = self.request.GET.get('child')
-        child = None
-        
-        if child_id:
-            if self.request.user.is_owner:
-                child = get_object_or_404(Child, id=child_id, owner=self.request.user)
-            else:
-                child = get_object_or_404(Child, id=child_id, family_members=self.request.user)
-        else:
-            if self.request.user.is_owner:
-                child = Child.objects.filter(owner=self.request.user).first()
-            else:
-                child = self.request.user.children.first()
+        child = get_accessible_child(self.request.user, self.request.GET.get('child'))
         
         if child:
             # Check if milestones feature is unlocked
@@ -34,22 +27,15 @@ class MilestoneListView(LoginRequiredMixin, TemplateView):
                 return redirect('core:dashboard')
             
             context['child'] = child
-            context['achieved_milestones'] = ChildMilestone.objects.filter(child=child)
-            context['categories'] = MilestoneCategory.objects.all()
-            
-            # Get available milestones to achieve
-            achieved_milestone_ids = context['achieved_milestones'].values_list(
-                'predefined_milestone_id', flat=True
-            )
-            context['available_milestones'] = PredefinedMilestone.objects.exclude(
-                id__in=achieved_milestone_ids
+            context['achieved_milestones'] = ChildMilestone.objects.filter(child=child).select_related(
+                'predefined_milestone__category'
             )
+            
+            # Overdue, due and upcoming milestones for the child's age, grouped by category
+            context['suggestion_groups'] = suggest_milestones(child)
         
         # Available children
-        if self.request.user.is_owner:
-            context['children'] = Child.objects.filter(owner=self.request.user)
-        else:
-            context['children'] = self.request.user.children.all()
+        context['children'] = get_accessible_children(self.request.user)
         
         return context
 
@@ -109,19 +95,7 @@ class GrowthChartView(LoginRequiredMixin, TemplateView):
         context = super().get_context_data(**kwargs)
         
         # Get child
-        child_id = self.request.GET.get('child')
-        child = None
-        
-        if child_id:
-            if self.request.user.is_owner:
-                child = get_object_or_404(Child, id=child_id, owner=self.request.user)
-            else:
-                child = get_object_or_404(Child, id=child_id, family_members=self.request.user)
-        else:
-            if self.request.user.is_owner:
-                child = Child.objects.filter(owner=self.request.user).first()
-            else:
-                child = self.request.user.children.first()
+        child = get_accessible_child(self.request.user, self.request.GET.get('child'))
         
         if child:
             # Check if growth chart feature is unlocked
@@ -130,24 +104,25 @@ class GrowthChartView(LoginRequiredMixin, TemplateView):
                 return redirect('core:dashboard')
             
             context['child'] = child
-            context['height_records'] = GrowthRecord.objects.filter(
-                child=child, measurement_type='height'
-            )
-            context['weight_records'] = GrowthRecord.objects.filter(
-                child=child, measurement_type='weight'
-            )
-            context['head_records'] = GrowthRecord.objects.filter(
-                child=child, measurement_type='head_circumference'
-            )
+            
+            # Measurements with z-scores and percentiles plus reference bands, per measurement type
+            context['growth_chart'] = get_growth_chart(child)
         
         # Available children
-        if self.request.user.is_owner:
-            context['children'] = Child.objects.filter(owner=self.request.user)
-        else:
-            context['children'] = self.request.user.children.all()
+        context['children'] = get_accessible_children(self.request.user)
         
         return context
 
+class GrowthChartDataView(LoginRequiredMixin, TemplateView):
+    def get(self, request):
+        child = get_accessible_child(request.user, request.GET.get('child'))
+        if not child:
+            return JsonResponse({'error': 'Child not found'}, status=404)
+        if not child.has_feature('growth_chart'):
+            return JsonResponse({'error': 'Growth chart is not unlocked yet'}, status=403)
+        
+        return JsonResponse(get_growth_chart(child))
+
 class AddGrowthRecordView(LoginRequiredMixin, TemplateView):
     template_name = 'milestones/add_growth.html'
     
@@ -171,4 +146,50 @@ class AddGrowthRecordView(LoginRequiredMixin, TemplateView):
             messages.success(request, "Growth record added successfully!")
             return redirect('milestones:growth_chart')
         
-        return render(request, self.template_name, {'form': form})
\ No newline at end of file
+        return render(request, self.template_name, {'form': form})
+
+class ImportDataView(LoginRequiredMixin, TemplateView):
+    template_name = 'milestones/import.html'
+    
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['children'] = get_accessible_children(self.request.user)
+        context['kinds'] = IMPORT_KINDS
+        return context
+    
+    def post(self, request):
+        if not request.POST.get('child'):
+            return JsonResponse({'error': 'Child ID required'}, status=400)
+        child = get_accessible_child(request.user, request.POST['child'])
+        
+        kind = request.POST.get('kind', 'growth')
+        if kind not in IMPORT_KINDS:
+            return JsonResponse({'error': f"kind must be one of {', '.join(IMPORT_KINDS)}"}, status=400)
+        
+        upload = request.FILES.get('file')
+        if not upload:
+            return JsonResponse({'error': 'A CSV or JSON file is required'}, status=400)
+        
+        response = StreamingHttpResponse(
+            self.stream_report(kind, child, request.user, upload),
+            content_type='application/x-ndjson'
+        )
+        # Stop nginx from buffering the per-batch reports
+        response['X-Accel-Buffering'] = 'no'
+        return response
+    
+    def stream_report(self, kind, child, user, upload):
+        """One JSON line per batch as it is written, then a summary line"""
+        imported = rows = 0
+        errors = []
+        try:
+            for report in import_rows(kind, child, user, read_rows(upload.file, upload.name)):
+                imported += report['imported']
+                rows = report['rows']
+                errors.extend(report['errors'])
+                yield json.dumps(report) + '\n'
+        except ValueError as e:
+            # Unreadable file: a bad encoding, malformed JSON or not an array
+            yield json.dumps({'error': str(e)}) + '\n'
+        
+        yield json.dumps({'done': True, 'rows': rows, 'imported': imported, 'failed': len(errors)}) + '\n'